@@ -38,7 +38,7 @@ class UniversityAdmin(ModelView, model=University):
 class SectionAdmin(ModelView, model=Section):
     name = "Section"
     name_plural = "Sections"
-    column_list = [Section.id, Section.name]
+    column_list = [Section.id, Section.name, Section.quiz_weight]
     can_edit = True
     can_delete = True
     can_create = True
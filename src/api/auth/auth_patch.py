@@ -7,12 +7,12 @@ from api.auth.auth_manager import get_user_manager
 from api.auth.auth_models import User
 from api.auth.auth_schemas import UserRead, UserUpdate, UserAdminUpdate
 from api.auth.base_config import current_user
-from api.feedback.feedback_db import delete_feedback_by_question_author_db
-from api.question.question_db import get_questions_id_db, delete_all_questions_db
-from api.rating.rating_db import get_rating_user_id, delete_rating_db
+from api.question.question_db import get_questions_id_db
+from api.rating.rating_db import get_rating_user_id
 from api.rating.rating_docs import SERVER_ERROR_AUTHORIZED_RESPONSE
 from api.section.section_service import SectionService
 from api.university.unviversity_service import UniversityService
+from core.cascade_delete import delete_user_cascade
 from core.dependecies import UOWDep, CurrentUser, CurrentSuperUser, Session
 from utilties.custom_exceptions import OutOfUniversityIdException, NotAllowedPatching, OutOfSectionIdException
 from utilties.error_code import ErrorCode
@@ -78,7 +78,7 @@ async def update_me(
             # Prevent user from changing own section if he had added question before
             questions_by_user = await get_questions_id_db(user_id=verified_user.id, session=session)
 
-            if questions_by_user:
+            if questions_by_user.questions:
                 raise NotAllowedPatching
 
         verified_user = await user_manager.update(
@@ -185,17 +185,6 @@ async def delete_user(
         user_for_delete=Depends(get_user_or_404),
         user_manager: BaseUserManager = Depends(get_user_manager),
 ):
-    user_id = user_for_delete.id
-    if user_for_delete.role_id == 1:
-        # Delete all records in rating table for the student
-        await delete_rating_db(user_id=user_id, session=session)
-
-    else:
-        # Delete all records in feedback table that question author get
-        await delete_feedback_by_question_author_db(user_id=user_id, session=session)
-
-        # Delete all records in questions table for the user
-        await delete_all_questions_db(user_id=user_id, session=session)
-
-    await user_manager.delete(user_for_delete)
+    # Delete the user with its ratings, feedbacks and questions at once
+    await delete_user_cascade(user=user_for_delete, user_manager=user_manager, session=session)
     return None
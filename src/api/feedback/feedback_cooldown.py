@@ -0,0 +1,130 @@
+"""
+Time rules of feedbacks: user can send feedback for the same question again only after resend cooldown, feedback can
+be edited only during edit window and deleted only after delete cooldown.
+
+Resend cooldown is a redis key with TTL per user and question, it is started when feedback is committed, so checking it
+doesn't read previous feedbacks. Newest feedback is read from db if the key is missing, feedback could be sent before
+cooldowns were kept in redis or while redis was unavailable, then the key is set from it
+"""
+import logging
+from datetime import datetime
+from typing import Iterable
+
+from redis.exceptions import RedisError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.feedback.feedback_db import feedback_last_added_db
+from db.redis_client import redis_client
+
+FEEDBACK_RESEND_COOLDOWN = 3600 * 12
+FEEDBACK_EDIT_WINDOW = 60 * 15
+FEEDBACK_DELETE_COOLDOWN = 3600 * 12
+
+logger = logging.getLogger(__name__)
+
+
+def remaining_seconds(added_at: datetime, period: int, now: datetime = None) -> int:
+    """Seconds left until period(seconds) after added_at elapses, 0 if it already elapsed"""
+    now = datetime.utcnow() if now is None else now
+
+    return max(period - int((now - added_at).total_seconds()), 0)
+
+
+class FeedbackCooldown:
+    def __init__(self, ttl: int = FEEDBACK_RESEND_COOLDOWN):
+        """
+        Resend cooldowns of feedbacks kept in redis
+        :param ttl: how much time(seconds) after feedback user can't send another one for the same question
+        """
+        self.ttl = ttl
+
+    @staticmethod
+    def _key(user_id: int, question_id: int) -> str:
+        return f"feedback_cooldown:{user_id}:{question_id}"
+
+    async def _ttls(self, user_id: int, questions_ids: list[int]) -> list[int] | None:
+        """TTLs of cooldowns keys by one round trip, missing key is -2. None if redis is unavailable"""
+        try:
+            async with redis_client.pipeline(transaction=False) as pipe:
+                for question_id in questions_ids:
+                    pipe.ttl(self._key(user_id, question_id))
+
+                return await pipe.execute()
+
+        except RedisError:
+            logger.warning("Redis is unavailable, feedback cooldown is read from db")
+            return None
+
+    async def _set_missing(self, user_id: int, remaining: dict[int, int]) -> None:
+        """Set missing keys of cooldowns computed from db, so the next checks don't read db"""
+        try:
+            async with redis_client.pipeline(transaction=False) as pipe:
+                for question_id, seconds in remaining.items():
+                    pipe.set(self._key(user_id, question_id), 1, ex=seconds, nx=True)
+
+                await pipe.execute()
+
+        except RedisError:
+            logger.warning("Redis is unavailable, feedback cooldown wasn't set")
+
+    async def remaining_many(self, user_id: int, last_added: dict[int, datetime | None]) -> dict[int, int]:
+        """
+        Seconds until user can send feedback again for every question, 0 if user can send it now
+        :param last_added: time of the newest feedback of user for every question, None if there is none. It is used
+         if the key is missing, feedback could be sent before cooldowns were kept in redis or while it was unavailable
+        """
+        questions_ids = list(last_added)
+        ttls = await self._ttls(user_id=user_id, questions_ids=questions_ids)
+
+        remaining = {}
+        missing = {}
+
+        for question_id, ttl in zip(questions_ids, ttls or [-2] * len(questions_ids)):
+            if ttl > 0:
+                remaining[question_id] = ttl
+                continue
+
+            added_at = last_added[question_id]
+            remaining[question_id] = remaining_seconds(added_at=added_at, period=self.ttl) if added_at else 0
+
+            if remaining[question_id]:
+                missing[question_id] = remaining[question_id]
+
+        if ttls is not None and missing:
+            await self._set_missing(user_id=user_id, remaining=missing)
+
+        return remaining
+
+    async def remaining(self, user_id: int, question_id: int, session: AsyncSession) -> int:
+        """Seconds until user can send feedback for question again, 0 if user can send it now"""
+        ttls = await self._ttls(user_id=user_id, questions_ids=[question_id])
+
+        if ttls is not None and ttls[0] > 0:
+            return ttls[0]
+
+        # Key is missing, it doesn't mean that there is no feedback
+        added_at = await feedback_last_added_db(question_id=question_id, user_id=user_id, session=session)
+        remaining = remaining_seconds(added_at=added_at, period=self.ttl) if added_at is not None else 0
+
+        if ttls is not None and remaining:
+            await self._set_missing(user_id=user_id, remaining={question_id: remaining})
+
+        return remaining
+
+    async def start(self, user_id: int, questions_ids: Iterable[int]) -> None:
+        """
+        Start cooldowns of questions after feedbacks for them are committed. Feedbacks are already saved, so redis
+        failure isn't raised, cooldowns are missing then until redis is available
+        """
+        try:
+            async with redis_client.pipeline(transaction=False) as pipe:
+                for question_id in questions_ids:
+                    pipe.set(self._key(user_id, question_id), 1, ex=self.ttl)
+
+                await pipe.execute()
+
+        except RedisError:
+            logger.warning("Redis is unavailable, feedback cooldowns weren't started")
+
+
+feedback_cooldown = FeedbackCooldown()
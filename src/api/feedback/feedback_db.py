@@ -1,13 +1,20 @@
 import itertools
+from collections import Counter
 from datetime import datetime
 
-from sqlalchemy import select, desc, delete, TIMESTAMP, func
+from sqlalchemy import Column, select, desc, delete, insert, update, or_, and_, func, TIMESTAMP
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from api.feedback.feedback_models import feedback
+from api.auth.auth_models import user
+from api.feedback.feedback_models import feedback, author_feedback_stats
+from api.feedback.feedback_schemas import FeedbackCreate, FeedbackUpdate
+from api.feedback.feedback_stats import add_author_stats_db, add_question_stats_db, add_feedbacks_stats_db
 from api.question.question_models import question
+from utilties.custom_exceptions import FeedbackNotFound
 from utilties.result_into_list import ResultIntoList
 
+FEEDBACK_PAGE_SIZE = 10
+
 
 async def get_remaining_time(added_time: TIMESTAMP, target_time):
     # return remaining turn until targeting time will be elapsed
@@ -17,15 +24,32 @@ async def get_remaining_time(added_time: TIMESTAMP, target_time):
     return remaining_time
 
 
-async def feedback_sent_db(page: int, session: AsyncSession, user_id: int):
+def _paginate_feed(query, key: Column, user_id: int, page: int, after: tuple[datetime, int] = None):
+    """
+    Filter feed by user and order it by the newest first, feed is read from (key, added_at, id) index
+    :param key: column of feedback that has id of user whose feed it is
+    :param after: added_at and id of the last feedback of previous page, page is ignored with it
+    """
+    query = query.where(key == user_id).order_by(desc(feedback.c.added_at), desc(feedback.c.id))
+
+    if after is not None:
+        added_at, feedback_id = after
+
+        return query.where(or_(feedback.c.added_at < added_at,
+                               and_(feedback.c.added_at == added_at, feedback.c.id < feedback_id))). \
+            limit(FEEDBACK_PAGE_SIZE)
+
+    offset = (page - 1) * FEEDBACK_PAGE_SIZE
+
+    return query.slice(offset, offset + FEEDBACK_PAGE_SIZE)
+
+
+async def feedback_sent_db(page: int, session: AsyncSession, user_id: int, after: tuple[datetime, int] = None):
     # get feedbacks that user send with pagination
-    page -= 1
-    page *= 10
 
-    question_query = select(feedback, question.c.question_title).where(feedback.c.user_id == user_id). \
-        join(question, feedback.c.question_id == question.c.id and
-             feedback.c.user_id == user_id).order_by(
-        desc(feedback.c.added_at)).slice(page, page + 10)
+    question_query = select(feedback, question.c.question_title). \
+        join(question, feedback.c.question_id == question.c.id)
+    question_query = _paginate_feed(question_query, key=feedback.c.user_id, user_id=user_id, page=page, after=after)
 
     result_proxy = await session.execute(question_query)
 
@@ -35,15 +59,14 @@ async def feedback_sent_db(page: int, session: AsyncSession, user_id: int):
     return result
 
 
-async def feedback_received_db(page: int, session: AsyncSession, user_id: int):
+async def feedback_received_db(page: int, session: AsyncSession, user_id: int, after: tuple[datetime, int] = None):
     # get feedbacks that supervisor/admin_panel receive with pagination
 
-    page -= 1
-    page *= 10
+    question_query = select(feedback, question.c.question_title). \
+        join(question, feedback.c.question_id == question.c.id)
+    question_query = _paginate_feed(question_query, key=feedback.c.question_author_id, user_id=user_id, page=page,
+                                    after=after)
 
-    question_query = select(feedback, question.c.question_title).join(question, feedback.c.question_id == question.c.id
-                                                                      and feedback.c.question_author_id == user_id). \
-        order_by(desc(feedback.c.added_at)).slice(page, page + 10)
     result_proxy = await session.execute(question_query)
 
     result = ResultIntoList(result_proxy=result_proxy)
@@ -65,26 +88,53 @@ async def feedback_by_id_db(feedback_id: int, session: AsyncSession):
     return result
 
 
-async def feedback_question_id_user_id_db(question_id: int, user_id: int, session: AsyncSession):
-    # get feedbacks by user_id and question_id
+async def feedback_last_added_db(question_id: int, user_id: int, session: AsyncSession) -> datetime | None:
+    """Get time of the newest feedback of user for question, None if user hasn't sent feedback for it"""
+    result_proxy = await session.execute(
+        select(func.max(feedback.c.added_at)).where(feedback.c.question_id == question_id,
+                                                    feedback.c.user_id == user_id)
+    )
 
-    feedback_query = select(feedback).where(
-        feedback.c.question_id == question_id and feedback.c.user_id == user_id).order_by(
-        feedback.c.added_at)
-    result_proxy = await session.execute(feedback_query)
+    return result_proxy.scalar()
 
-    result = ResultIntoList(result_proxy=result_proxy)
+
+async def feedback_title_exists_db(question_id: int, user_id: int, feedback_title: str, session: AsyncSession) -> bool:
+    """Check whether user already sent feedback with this title for question"""
+    result_proxy = await session.execute(
+        select(feedback.c.id).where(feedback.c.question_id == question_id, feedback.c.user_id == user_id,
+                                    feedback.c.feedback_title == feedback_title).limit(1)
+    )
+
+    return result_proxy.first() is not None
+
+
+async def get_rating_supervisor_db(user_id: int, session: AsyncSession):
+    """Get rating of supervisor by user_id from precomputed aggregate"""
+    rating_supervisor = select(
+        (author_feedback_stats.c.rating_sum / author_feedback_stats.c.rating_count).label('average_rating'),
+        author_feedback_stats.c.rating_count.label('feedback_count')). \
+        where(author_feedback_stats.c.author_id == user_id, author_feedback_stats.c.rating_count > 0)
+
+    rating_supervisor = await session.execute(rating_supervisor)
+    result = ResultIntoList(result_proxy=rating_supervisor)
     result = list(itertools.chain(result.parse()))
 
-    return result
+    # Supervisor without feedbacks has no rating
+    return result or [{"average_rating": None, "feedback_count": 0}]
 
 
-async def check_feedback_question_id(question_id: int, session: AsyncSession):
-    # check if question has feedback
+async def get_best_supervisors_db(session: AsyncSession, limit: int = 10):
+    """Get supervisors with the best average rating above 2.5 from precomputed aggregates"""
+    average_rating = author_feedback_stats.c.rating_sum / author_feedback_stats.c.rating_count
 
-    feedback_query = select(feedback).where(
-        feedback.c.question_id == question_id).limit(1)
-    result_proxy = await session.execute(feedback_query)
+    query = select(user.c.username, average_rating.label('average_rating'),
+                   author_feedback_stats.c.rating_count.label('count_of_rates')). \
+        join(user, user.c.id == author_feedback_stats.c.author_id). \
+        where(author_feedback_stats.c.rating_count > 0,
+              author_feedback_stats.c.rating_sum > 2.5 * author_feedback_stats.c.rating_count). \
+        order_by(desc(average_rating)).limit(limit)
+
+    result_proxy = await session.execute(query)
 
     result = ResultIntoList(result_proxy=result_proxy)
     result = list(itertools.chain(result.parse()))
@@ -92,37 +142,74 @@ async def check_feedback_question_id(question_id: int, session: AsyncSession):
     return result
 
 
-async def get_rating_supervisor_db(user_id: int, session: AsyncSession):
-    """Get rating of supervisor by user_id"""
-    rating_supervisor = select(
-        (func.sum(feedback.c.rating) / func.count(feedback.c.id)).label('average_rating'),
-        func.count(feedback.c.id).label('feedback_count')).where(feedback.c.question_author_id == user_id)
+async def feedbacks_questions_user_db(questions_ids: list[int], user_id: int, session: AsyncSession):
+    """Get feedbacks that user sent for any of questions, the newest first"""
+    if not questions_ids:
+        return []
 
-    rating_supervisor = await session.execute(rating_supervisor)
-    result = ResultIntoList(result_proxy=rating_supervisor)
-    result = list(itertools.chain(result.parse()))
+    feedback_query = select(feedback.c.question_id, feedback.c.feedback_title, feedback.c.added_at). \
+        where(feedback.c.user_id == user_id, feedback.c.question_id.in_(questions_ids)). \
+        order_by(desc(feedback.c.added_at))
+    result_proxy = await session.execute(feedback_query)
 
-    return result
+    return result_proxy.all()
 
 
-async def delete_feedback_question_id(question_id: int, session: AsyncSession):
-    # delete feedback for specific question
+async def insert_feedbacks_db(feedbacks_create: list[FeedbackCreate], session: AsyncSession):
+    """Insert feedbacks by one multi-row statement and add their ratings to aggregates in one transaction"""
+    if not feedbacks_create:
+        return None
 
-    stmt = delete(feedback).where(feedback.c.question_id == question_id)
-    await session.execute(stmt)
+    added_at = datetime.utcnow()
+
+    await session.execute(insert(feedback), [{**feedback_create.model_dump(), "added_at": added_at}
+                                             for feedback_create in feedbacks_create])
+    await add_feedbacks_stats_db(feedbacks=feedbacks_create, feedback_at=added_at, session=session)
     await session.commit()
 
 
-async def delete_feedback_id(feedback_id: int, session: AsyncSession):
-    # delete feedback by feedback_id
+async def insert_feedback_db(feedback_create: FeedbackCreate, session: AsyncSession):
+    """Insert feedback and add its rating to aggregates of question and its author in one transaction"""
+    await insert_feedbacks_db(feedbacks_create=[feedback_create], session=session)
 
-    stmt = delete(feedback).where(feedback.c.id == feedback_id)
+
+async def update_feedback_db(feedback_id: int, feedback_update: FeedbackUpdate, session: AsyncSession):
+    """Update rating and title of feedback and move aggregates of question and its author by rating difference"""
+    result_proxy = await session.execute(
+        select(feedback.c.rating, feedback.c.question_id, feedback.c.question_author_id).
+        where(feedback.c.id == feedback_id).with_for_update()
+    )
+    row = result_proxy.one_or_none()
+
+    if row is None:
+        raise FeedbackNotFound
+
+    # Feedback moves from old rating to new one in histogram of question
+    histogram = Counter({feedback_update.rating: 1})
+    histogram.subtract({row.rating: 1})
+
+    stmt = update(feedback).values(**feedback_update.model_dump()).where(feedback.c.id == feedback_id)
     await session.execute(stmt)
+    await add_author_stats_db(author_id=row.question_author_id, rating_sum=feedback_update.rating - row.rating,
+                              rating_count=0, session=session)
+    await add_question_stats_db(question_id=row.question_id, histogram=histogram, session=session)
     await session.commit()
 
 
-async def delete_feedback_by_question_author_db(user_id: int, session: AsyncSession):
-    """delete feedback by question_author_id"""
-    stmt = delete(feedback).where(feedback.c.question_author_id == user_id)
+async def delete_feedback_id(feedback_id: int, session: AsyncSession):
+    """Delete feedback by feedback_id and remove its rating from aggregates of question and its author"""
+    result_proxy = await session.execute(
+        select(feedback.c.rating, feedback.c.question_id, feedback.c.question_author_id).
+        where(feedback.c.id == feedback_id).with_for_update()
+    )
+    row = result_proxy.one_or_none()
+
+    if row is None:
+        raise FeedbackNotFound
+
+    stmt = delete(feedback).where(feedback.c.id == feedback_id)
     await session.execute(stmt)
+    await add_author_stats_db(author_id=row.question_author_id, rating_sum=-row.rating, rating_count=-1,
+                              session=session)
+    await add_question_stats_db(question_id=row.question_id, histogram={row.rating: -1}, session=session)
     await session.commit()
@@ -55,6 +55,10 @@ GET_FEEDBACK_RECEIVED_RESPONSES: OpenAPIResponseType = {
                     ErrorCode.INVALID_PAGE: {
                         "summary": "Invalid page",
                         "value": {"detail": ErrorCode.INVALID_PAGE},
+                    },
+                    ErrorCode.INVALID_CURSOR: {
+                        "summary": "Cursor is damaged, use next_cursor of previous page",
+                        "value": {"detail": ErrorCode.INVALID_CURSOR},
                     }
                 }
             },
@@ -82,6 +86,10 @@ GET_FEEDBACK_SENT_RESPONSES: OpenAPIResponseType = {
                     ErrorCode.INVALID_PAGE: {
                         "summary": "Invalid page",
                         "value": {"detail": ErrorCode.INVALID_PAGE},
+                    },
+                    ErrorCode.INVALID_CURSOR: {
+                        "summary": "Cursor is damaged, use next_cursor of previous page",
+                        "value": {"detail": ErrorCode.INVALID_CURSOR},
                     }
                 }
             },
@@ -162,8 +170,38 @@ DELETE_FEEDBACK_RESPONSES: OpenAPIResponseType = {
     },
 }
 
+GET_QUESTION_STATS_RESPONSES: OpenAPIResponseType = {
+    status.HTTP_404_NOT_FOUND: {
+        "model": ErrorModel,
+        "content": {
+            "application/json": {
+                "examples": {ErrorCode.QUESTION_NOT_FOUND: {
+                    "summary": "Question not exists",
+                    "value": {"detail": ErrorCode.QUESTION_NOT_FOUND},
+                }
+                }
+            },
+        },
+    },
+    status.HTTP_405_METHOD_NOT_ALLOWED: {
+        "model": ErrorModel,
+        "content": {
+            "application/json": {
+                "examples": {ErrorCode.USER_NOT_ADMIN_SUPERVISOR: {
+                    "summary": "Only supervisor or admin_panel can see feedback statistics",
+                    "value": {"detail": ErrorCode.USER_NOT_ADMIN_SUPERVISOR},
+                }
+                }
+            },
+        },
+    },
+}
+# Rejected feedbacks are reported in response by their error codes, batch itself fails only by server error
+ADD_FEEDBACKS_BATCH_RESPONSES: OpenAPIResponseType = {}
 ADD_FEEDBACK_RESPONSES.update(SERVER_ERROR_AUTHORIZED_RESPONSE)
+ADD_FEEDBACKS_BATCH_RESPONSES.update(SERVER_ERROR_AUTHORIZED_RESPONSE)
 GET_FEEDBACK_RECEIVED_RESPONSES.update(SERVER_ERROR_AUTHORIZED_RESPONSE)
 GET_FEEDBACK_SENT_RESPONSES.update(SERVER_ERROR_AUTHORIZED_RESPONSE)
 PATCH_FEEDBACK_RESPONSES.update(SERVER_ERROR_AUTHORIZED_RESPONSE)
 DELETE_FEEDBACK_RESPONSES.update(SERVER_ERROR_AUTHORIZED_RESPONSE)
+GET_QUESTION_STATS_RESPONSES.update(SERVER_ERROR_AUTHORIZED_RESPONSE)
@@ -31,6 +31,11 @@ class Errors(NamedTuple):
         detail=ErrorCode.INVALID_PAGE
     )
 
+    invalid_cursor_400 = HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=ErrorCode.INVALID_CURSOR
+    )
+
     user_not_allowed_405 = HTTPException(
         status_code=status.HTTP_405_METHOD_NOT_ALLOWED,
         detail=ErrorCode.USER_NOT_ADMIN_SUPERVISOR
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import MetaData, Table, Column, Integer, String, TIMESTAMP, ForeignKey
+from sqlalchemy import MetaData, Table, Column, Integer, String, TIMESTAMP, ForeignKey, Index
 from sqlalchemy.dialects.mysql import SMALLINT
 
 from api.auth.auth_models import user
@@ -17,5 +17,34 @@ feedback = Table(
     Column("added_at", TIMESTAMP, default=datetime.utcnow, nullable=False),
     Column("user_id", Integer, ForeignKey(user.c.id), nullable=False),
     Column("question_id", Integer, ForeignKey(question.c.id), nullable=False),
-    Column("question_author_id", Integer, ForeignKey(user.c.id), nullable=False)
+    Column("question_author_id", Integer, ForeignKey(user.c.id), nullable=False),
+    # Feeds of received and sent feedbacks are read from these indexes the newest first
+    Index("ix_feedback_question_author_id_added_at_id", "question_author_id", "added_at", "id"),
+    Index("ix_feedback_user_id_added_at_id", "user_id", "added_at", "id")
+)
+
+# Sum and count of ratings that every question author received, changed in the same transaction as feedbacks
+author_feedback_stats = Table(
+    "author_feedback_stats",
+    metadata,
+    Column("author_id", Integer, ForeignKey(user.c.id), primary_key=True),
+    Column("rating_sum", Integer, default=0, nullable=False),
+    Column("rating_count", Integer, default=0, nullable=False),
+    Column("last_updated", TIMESTAMP, default=datetime.utcnow, nullable=False)
+)
+
+# Number of feedbacks, sum of ratings and histogram of ratings of every question, changed as author aggregate
+question_feedback_stats = Table(
+    "question_feedback_stats",
+    metadata,
+    Column("question_id", Integer, ForeignKey(question.c.id), primary_key=True),
+    Column("rating_sum", Integer, default=0, nullable=False),
+    Column("rating_count", Integer, default=0, nullable=False),
+    # Number of feedbacks with every rating
+    Column("rating_1", Integer, default=0, nullable=False),
+    Column("rating_2", Integer, default=0, nullable=False),
+    Column("rating_3", Integer, default=0, nullable=False),
+    Column("rating_4", Integer, default=0, nullable=False),
+    Column("rating_5", Integer, default=0, nullable=False),
+    Column("last_feedback_at", TIMESTAMP, nullable=True)
 )
@@ -1,26 +1,39 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+import math
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Body
 from fastapi.security import HTTPBearer
-from sqlalchemy import insert, update
 from starlette import status
 
 from api.feedback.feedback_db import (
     feedback_sent_db,
     feedback_received_db,
     feedback_by_id_db,
-    feedback_question_id_user_id_db,
+    feedback_title_exists_db,
     delete_feedback_id,
-    get_remaining_time
+    insert_feedback_db,
+    update_feedback_db,
+    FEEDBACK_PAGE_SIZE
+)
+from api.feedback.feedback_cooldown import (
+    FEEDBACK_EDIT_WINDOW,
+    FEEDBACK_DELETE_COOLDOWN,
+    feedback_cooldown,
+    remaining_seconds
 )
 from api.feedback.feedback_docs import (
     ADD_FEEDBACK_RESPONSES,
+    ADD_FEEDBACKS_BATCH_RESPONSES,
     GET_FEEDBACK_SENT_RESPONSES,
     PATCH_FEEDBACK_RESPONSES,
     GET_FEEDBACK_RECEIVED_RESPONSES,
-    DELETE_FEEDBACK_RESPONSES
+    DELETE_FEEDBACK_RESPONSES,
+    GET_QUESTION_STATS_RESPONSES
 )
 from api.feedback.feedback_errors import Errors
-from api.feedback.feedback_models import feedback
+from api.feedback.feedback_service import add_feedbacks_service, FEEDBACK_BATCH_MAX_SIZE
 from api.feedback.feedback_schemas import FeedbackRead, FeedbackUpdate, FeedbackCreate
+from api.feedback.feedback_stats import RATINGS, get_question_stats_db
 from api.question.question_db import get_question_id_db
 from core.dependecies import CurrentUser, Session
 from utilties.custom_exceptions import (
@@ -33,8 +46,10 @@ from utilties.custom_exceptions import (
     FeedbackNotEditable,
     UserNotAdminSupervisor,
     NotAllowedDeleteBeforeTime,
-    NotAllowed
+    NotAllowed,
+    InvalidCursor
 )
+from utilties.cursor import encode_cursor, decode_cursor, timestamp_to_cursor, cursor_to_timestamp
 
 feedback_router = APIRouter(
     prefix="/feedback",
@@ -42,6 +57,24 @@ feedback_router = APIRouter(
 )
 
 
+def get_feed_after(cursor: str | None) -> tuple[datetime, int] | None:
+    """Position in feed after which the page starts, None for the first page"""
+    if cursor is None:
+        return None
+
+    added_at, feedback_id = decode_cursor(cursor, size=2)
+
+    return cursor_to_timestamp(added_at), feedback_id
+
+
+def get_feed_next_cursor(feedbacks: list[dict]) -> str | None:
+    """Cursor of the next page, None if the page isn't full so there is nothing after it"""
+    if len(feedbacks) < FEEDBACK_PAGE_SIZE:
+        return None
+
+    return encode_cursor(timestamp_to_cursor(feedbacks[-1]["added_at"]), feedbacks[-1]["id"])
+
+
 @feedback_router.post("/add", name="feedback:add feedback", dependencies=[Depends(HTTPBearer())],
                       responses=ADD_FEEDBACK_RESPONSES)
 async def add_feedback(
@@ -62,21 +95,16 @@ async def add_feedback(
             if result_question[0]["added_by"] == verified_user.id:
                 raise NotAllowed
 
-        result = await feedback_question_id_user_id_db(question_id=added_feedback.question_id,
-                                                       user_id=verified_user.id, session=session)
-
-        remaining_time = None
-
-        if result:
-            remaining_time = await get_remaining_time(result[0]["added_at"], target_time=3600 * 12)
-            remaining_time = remaining_time // 3600
+        remaining_time = await feedback_cooldown.remaining(user_id=verified_user.id,
+                                                           question_id=added_feedback.question_id, session=session)
 
-            if remaining_time > 0:
-                raise FeedbackAlreadySent
+        if remaining_time:
+            remaining_time = math.ceil(remaining_time / 3600)
+            raise FeedbackAlreadySent
 
-            for row in result:
-                if row["feedback_title"] == added_feedback.feedback_title:
-                    raise DuplicatedTitle
+        if await feedback_title_exists_db(question_id=added_feedback.question_id, user_id=verified_user.id,
+                                          feedback_title=added_feedback.feedback_title, session=session):
+            raise DuplicatedTitle
 
         feedback_create = FeedbackCreate(rating=added_feedback.rating,
                                          feedback_title=added_feedback.feedback_title,
@@ -85,9 +113,8 @@ async def add_feedback(
                                          question_author_id=result_question[0]["added_by"]
                                          )
 
-        stmt = insert(feedback).values(**feedback_create.model_dump())
-        await session.execute(stmt)
-        await session.commit()
+        await insert_feedback_db(feedback_create=feedback_create, session=session)
+        await feedback_cooldown.start(user_id=verified_user.id, questions_ids=[added_feedback.question_id])
 
         return {"status": "success",
                 "data": added_feedback,
@@ -113,27 +140,56 @@ async def add_feedback(
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=Exception)
 
 
+@feedback_router.post("/add/batch", name="feedback:add feedbacks batch", dependencies=[Depends(HTTPBearer())],
+                      responses=ADD_FEEDBACKS_BATCH_RESPONSES)
+async def add_feedbacks_batch(
+        verified_user: CurrentUser,
+        session: Session,
+        added_feedbacks: list[FeedbackRead] = Body(min_length=1, max_length=FEEDBACK_BATCH_MAX_SIZE),
+):
+    """
+    Add feedbacks for questions of quiz at once, every feedback is checked by rules of adding single feedback. Valid
+    feedbacks are added even if others are rejected, errors of rejected ones are returned with their positions
+    """
+    try:
+        report = await add_feedbacks_service(feedbacks=added_feedbacks, user_id=verified_user.id, session=session)
+
+        return {"status": "success",
+                "data": {"added": report.added,
+                         "errors": [error._asdict() for error in report.errors]},
+                "detail": None
+                }
+
+    except Exception:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=Exception)
+
+
 @feedback_router.get("/get/sent", name="feedback:get sent feedback", dependencies=[Depends(HTTPBearer())],
                      responses=GET_FEEDBACK_SENT_RESPONSES)
 async def get_sent_feedback(
         verified_user: CurrentUser,
         session: Session,
         page: int = Query(gt=0, default=1),
+        cursor: str | None = Query(default=None, description="next_cursor of previous page, page is ignored with it"),
 ):
     try:
         if page < 1:
             raise InvalidPage
 
-        result = await feedback_sent_db(page=page, session=session, user_id=verified_user.id)
+        result = await feedback_sent_db(page=page, session=session, user_id=verified_user.id,
+                                        after=get_feed_after(cursor))
 
         return {"status": "success",
                 "data": result,
-                "detail": None
+                "detail": {"next_cursor": get_feed_next_cursor(result)}
                 }
 
     except InvalidPage:
         raise Errors.invalid_page_number_400
 
+    except InvalidCursor:
+        raise Errors.invalid_cursor_400
+
     except Exception:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=Exception)
 
@@ -144,6 +200,7 @@ async def get_sent_received(
         verified_user: CurrentUser,
         session: Session,
         page: int = Query(gt=0, default=1),
+        cursor: str | None = Query(default=None, description="next_cursor of previous page, page is ignored with it"),
 ):
     try:
         if verified_user.role_id == 1:
@@ -152,16 +209,20 @@ async def get_sent_received(
         if page < 1:
             raise InvalidPage
 
-        result = await feedback_received_db(page=page, session=session, user_id=verified_user.id)
+        result = await feedback_received_db(page=page, session=session, user_id=verified_user.id,
+                                            after=get_feed_after(cursor))
 
         return {"status": "success",
                 "data": result,
-                "detail": None
+                "detail": {"next_cursor": get_feed_next_cursor(result)}
                 }
 
     except InvalidPage:
         raise Errors.invalid_page_number_400
 
+    except InvalidCursor:
+        raise Errors.invalid_cursor_400
+
     except UserNotAdminSupervisor:
         raise Errors.user_not_allowed_405
 
@@ -169,6 +230,46 @@ async def get_sent_received(
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=Exception)
 
 
+@feedback_router.get("/stats/question", name="feedback:get question statistics", dependencies=[Depends(HTTPBearer())],
+                     responses=GET_QUESTION_STATS_RESPONSES)
+async def get_question_stats(
+        verified_user: CurrentUser,
+        session: Session,
+        question_id: int = Query(gt=0),
+):
+    """Get number, average and histogram of ratings and time of the last feedback of question"""
+    try:
+        if verified_user.role_id == 1:
+            raise UserNotAdminSupervisor
+
+        result = await get_question_stats_db(question_id=question_id, session=session)
+
+        if result is None:
+            # Question without feedbacks has no aggregate, so check that it exists
+            if not await get_question_id_db(question_id=question_id, session=session):
+                raise QuestionNotFound
+
+            result = {"question_id": question_id,
+                      "rating_count": 0,
+                      "average_rating": None,
+                      "histogram": {rating: 0 for rating in RATINGS},
+                      "last_feedback_at": None}
+
+        return {"status": "success",
+                "data": result,
+                "detail": None
+                }
+
+    except UserNotAdminSupervisor:
+        raise Errors.user_not_allowed_405
+
+    except QuestionNotFound:
+        raise Errors.question_not_exists_404
+
+    except Exception:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=Exception)
+
+
 @feedback_router.patch("/patch", name="feedback:patch feedback", dependencies=[Depends(HTTPBearer())],
                        responses=PATCH_FEEDBACK_RESPONSES)
 async def patch_feedback(
@@ -194,10 +295,7 @@ async def patch_feedback(
         if feedback_result[0]["user_id"] != verified_user.id and verified_user.id != 3:
             raise NotAllowed
 
-        remaining_time = await get_remaining_time(feedback_result[0]["added_at"], target_time=900)
-        remaining_time = remaining_time // 60
-
-        if abs(remaining_time) > 15:
+        if not remaining_seconds(added_at=feedback_result[0]["added_at"], period=FEEDBACK_EDIT_WINDOW):
             raise FeedbackNotEditable
 
         for row in feedback_result:
@@ -206,7 +304,7 @@ async def patch_feedback(
                                                  feedback_title=row["feedback_title"],
                                                  user_id=row["user_id"],
                                                  question_id=row["question_id"],
-                                                 question_author_id=question_result[0]["question_author_id"]
+                                                 question_author_id=row["question_author_id"]
                                                  )
                 return {"status": "success",
                         "data": returned_object,
@@ -217,12 +315,10 @@ async def patch_feedback(
                                          feedback_title=edited_feedback.feedback_title,
                                          user_id=feedback_result[0]["user_id"],
                                          question_id=feedback_result[0]["question_id"],
-                                         question_author_id=question_result[0]["question_author_id"]
+                                         question_author_id=feedback_result[0]["question_author_id"]
                                          )
 
-        stmt = update(feedback).values(**feedback_create.model_dump()).where(feedback.c.id == feedback_id)
-        await session.execute(stmt)
-        await session.commit()
+        await update_feedback_db(feedback_id=feedback_id, feedback_update=edited_feedback, session=session)
 
         return {"status": "success",
                 "data": feedback_create,
@@ -263,11 +359,11 @@ async def delete_feedback(
             if feedback_result[0]["user_id"] != verified_user.id and verified_user.id != 3:
                 raise NotAllowed
 
-            remaining_time = await get_remaining_time(feedback_result[0]["added_at"], target_time=3600 * 12)
-            remaining_time = remaining_time // 3600
+            remaining_time = remaining_seconds(added_at=feedback_result[0]["added_at"], period=FEEDBACK_DELETE_COOLDOWN)
 
-            if remaining_time > 0:
-                raise NotAllowed
+            if remaining_time:
+                remaining_time = math.ceil(remaining_time / 3600)
+                raise NotAllowedDeleteBeforeTime
 
         await delete_feedback_id(feedback_id=feedback_id, session=session)
 
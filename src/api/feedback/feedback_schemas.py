@@ -2,7 +2,7 @@ from datetime import datetime
 from typing import Optional
 
 from pydantic import BaseModel
-from sqlalchemy import Integer, Column, String, TIMESTAMP, ForeignKey
+from sqlalchemy import Integer, Column, String, TIMESTAMP, ForeignKey, Index
 from sqlalchemy.dialects.mysql import SMALLINT
 
 from api.auth.auth_models import user
@@ -31,6 +31,10 @@ class FeedbackUpdate(BaseModel):
 
 class Feedback(Base):
     __tablename__ = "feedback"
+    __table_args__ = (
+        Index("ix_feedback_question_author_id_added_at_id", "question_author_id", "added_at", "id"),
+        Index("ix_feedback_user_id_added_at_id", "user_id", "added_at", "id"),
+    )
     id = Column(Integer, primary_key=True)
     rating = Column(SMALLINT(unsigned=True), nullable=False)
     feedback_title = Column(String(length=255), nullable=False)
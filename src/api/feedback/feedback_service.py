@@ -0,0 +1,104 @@
+from collections import defaultdict
+from typing import NamedTuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.feedback.feedback_cooldown import feedback_cooldown
+from api.feedback.feedback_db import feedbacks_questions_user_db, insert_feedbacks_db
+from api.feedback.feedback_schemas import FeedbackRead, FeedbackCreate
+from api.question.question_db import get_questions_authors_db
+from utilties.error_code import ErrorCode
+
+# Quiz has at most 50 questions, so one batch rates at most 50 questions
+FEEDBACK_BATCH_MAX_SIZE = 50
+
+
+class ItemError(NamedTuple):
+    # Position of item in request starting from 0
+    item: int
+    detail: str
+
+
+class FeedbackBatchReport(NamedTuple):
+    added: int
+    errors: list[ItemError]
+
+
+def _validate_item(
+        item: FeedbackRead,
+        user_id: int,
+        authors: dict[int, int],
+        previous: list,
+        cooldown: int,
+) -> str | None:
+    """Apply rules of adding single feedback, return error code if item is invalid"""
+    if item.rating not in (1, 2, 3, 4, 5):
+        return ErrorCode.RATING_EXCEPTION
+
+    if item.question_id not in authors:
+        return ErrorCode.QUESTION_NOT_FOUND
+
+    if authors[item.question_id] == user_id:
+        return ErrorCode.NOT_ALLOWED_FEEDBACK_YOURSELF
+
+    if cooldown:
+        return ErrorCode.FEEDBACK_ALREADY_SENT
+
+    if any(row.feedback_title == item.feedback_title for row in previous):
+        return ErrorCode.DUPLICATED_TITLE
+
+    return None
+
+
+async def add_feedbacks_service(
+        feedbacks: list[FeedbackRead],
+        user_id: int,
+        session: AsyncSession,
+) -> FeedbackBatchReport:
+    """
+    Validate feedbacks for many questions at once and insert valid ones in one transaction. Questions and previous
+    feedbacks of user are read by one query each
+    :returns: number of added feedbacks and errors of rejected items
+    """
+    questions_ids = list({item.question_id for item in feedbacks})
+
+    authors = await get_questions_authors_db(questions_ids=questions_ids, session=session)
+    previous = defaultdict(list)
+
+    # Feedbacks come the newest first, so the first one of every question is the last sent
+    for row in await feedbacks_questions_user_db(questions_ids=list(authors), user_id=user_id, session=session):
+        previous[row.question_id].append(row)
+
+    # Previous feedbacks are already read for titles, so the newest of them is used if cooldown key is missing
+    cooldowns = await feedback_cooldown.remaining_many(
+        user_id=user_id,
+        last_added={question_id: previous[question_id][0].added_at if previous[question_id] else None
+                    for question_id in authors}
+    )
+    errors = []
+    feedbacks_create = []
+    rated_questions = set()
+
+    for index, item in enumerate(feedbacks):
+        error = _validate_item(item=item, user_id=user_id, authors=authors, previous=previous[item.question_id],
+                               cooldown=cooldowns.get(item.question_id, 0))
+
+        # The same question can be rated once by batch
+        if error is None and item.question_id in rated_questions:
+            error = ErrorCode.FEEDBACK_ALREADY_SENT
+
+        if error is not None:
+            errors.append(ItemError(item=index, detail=error))
+            continue
+
+        rated_questions.add(item.question_id)
+        feedbacks_create.append(FeedbackCreate(rating=item.rating,
+                                               feedback_title=item.feedback_title,
+                                               user_id=user_id,
+                                               question_id=item.question_id,
+                                               question_author_id=authors[item.question_id]))
+
+    await insert_feedbacks_db(feedbacks_create=feedbacks_create, session=session)
+    await feedback_cooldown.start(user_id=user_id, questions_ids=rated_questions)
+
+    return FeedbackBatchReport(added=len(feedbacks_create), errors=errors)
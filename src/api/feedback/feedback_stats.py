@@ -0,0 +1,166 @@
+"""
+Aggregates of feedbacks, they are changed in the same transaction as feedbacks themselves
+
+Aggregates of feedbacks written before they existed are built by one-off job, run it from src directory:
+    python -m api.feedback.feedback_stats
+"""
+import asyncio
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Iterable, Mapping
+
+from sqlalchemy import Table, Column, select, update, insert, delete, func, case
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.feedback.feedback_models import feedback, author_feedback_stats, question_feedback_stats
+from db.database import async_session_maker
+
+RATINGS = range(1, 6)
+
+
+async def _add_stats(
+        table: Table,
+        key: Column,
+        key_value: int,
+        increments: dict[str, int],
+        session: AsyncSession,
+        **values,
+) -> None:
+    """
+    Add increments to counters of aggregate row and set values without committing, the row is created by the first
+    added feedback. Removing feedbacks of missing row means aggregates weren't built yet, nothing is changed then
+    :param increments: column name and number that is added to it, rating_count is required
+    :param values: columns that are set as is
+    """
+    stmt = update(table). \
+        values({**{name: table.c[name] + increment for name, increment in increments.items()}, **values}). \
+        where(key == key_value)
+    result_proxy = await session.execute(stmt)
+
+    if result_proxy.rowcount or increments["rating_count"] <= 0:
+        return None
+
+    try:
+        async with session.begin_nested():
+            await session.execute(insert(table).values({key.name: key_value, **increments, **values}))
+
+    except IntegrityError:
+        # Concurrent feedback inserted the row after update above
+        await session.execute(stmt)
+
+
+async def add_author_stats_db(author_id: int, rating_sum: int, rating_count: int, session: AsyncSession) -> None:
+    """
+    Add ratings to aggregate of question author without committing, negative values remove them
+    :param rating_sum: sum of added ratings
+    :param rating_count: number of added feedbacks
+    """
+    await _add_stats(table=author_feedback_stats, key=author_feedback_stats.c.author_id, key_value=author_id,
+                     increments={"rating_sum": rating_sum, "rating_count": rating_count}, session=session,
+                     last_updated=datetime.utcnow())
+
+
+async def add_question_stats_db(
+        question_id: int,
+        histogram: Mapping[int, int],
+        session: AsyncSession,
+        feedback_at: datetime = None,
+) -> None:
+    """
+    Add ratings to aggregate of question without committing
+    :param histogram: number of added feedbacks for every rating, negative numbers remove them
+    :param feedback_at: time of the newest added feedback, last feedback time isn't moved back by removing
+    """
+    increments = {"rating_sum": sum(rating * number for rating, number in histogram.items()),
+                  "rating_count": sum(histogram.values())}
+    increments.update({f"rating_{rating}": number for rating, number in histogram.items() if number})
+
+    values = {"last_feedback_at": feedback_at} if feedback_at is not None else {}
+
+    await _add_stats(table=question_feedback_stats, key=question_feedback_stats.c.question_id, key_value=question_id,
+                     increments=increments, session=session, **values)
+
+
+async def add_feedbacks_stats_db(
+        feedbacks: Iterable,
+        session: AsyncSession,
+        removed: bool = False,
+        feedback_at: datetime = None,
+) -> None:
+    """
+    Add ratings of many feedbacks to aggregates without committing, every author and question is changed once
+    :param feedbacks: objects that have rating, question_id and question_author_id
+    :param removed: remove ratings of deleted feedbacks instead of adding them
+    :param feedback_at: time when feedbacks were added
+    """
+    sign = -1 if removed else 1
+    ratings_sums, ratings_counts = Counter(), Counter()
+    histograms = defaultdict(Counter)
+
+    for row in feedbacks:
+        ratings_sums[row.question_author_id] += sign * row.rating
+        ratings_counts[row.question_author_id] += sign
+        histograms[row.question_id][row.rating] += sign
+
+    for author_id, rating_count in ratings_counts.items():
+        await add_author_stats_db(author_id=author_id, rating_sum=ratings_sums[author_id], rating_count=rating_count,
+                                  session=session)
+
+    for question_id, histogram in histograms.items():
+        await add_question_stats_db(question_id=question_id, histogram=histogram, feedback_at=feedback_at,
+                                    session=session)
+
+
+async def get_question_stats_db(question_id: int, session: AsyncSession) -> dict | None:
+    """Get aggregate of question feedbacks, None if question has no feedbacks yet"""
+    result_proxy = await session.execute(
+        select(question_feedback_stats).where(question_feedback_stats.c.question_id == question_id)
+    )
+    row = result_proxy.mappings().one_or_none()
+
+    if row is None or not row["rating_count"]:
+        return None
+
+    return {"question_id": row["question_id"],
+            "rating_count": row["rating_count"],
+            "average_rating": row["rating_sum"] / row["rating_count"],
+            "histogram": {rating: row[f"rating_{rating}"] for rating in RATINGS},
+            "last_feedback_at": row["last_feedback_at"]}
+
+
+async def rebuild_author_stats_db(session: AsyncSession) -> None:
+    """Build aggregates of all authors from feedback table again"""
+    await session.execute(delete(author_feedback_stats))
+    await session.execute(insert(author_feedback_stats).from_select(
+        ["author_id", "rating_sum", "rating_count", "last_updated"],
+        select(feedback.c.question_author_id, func.sum(feedback.c.rating), func.count(feedback.c.id),
+               func.max(feedback.c.added_at)).group_by(feedback.c.question_author_id)
+    ))
+    await session.commit()
+
+
+async def rebuild_question_stats_db(session: AsyncSession) -> None:
+    """Build aggregates of all questions from feedback table again"""
+    await session.execute(delete(question_feedback_stats))
+    await session.execute(insert(question_feedback_stats).from_select(
+        ["question_id", "rating_sum", "rating_count", *[f"rating_{rating}" for rating in RATINGS], "last_feedback_at"],
+        select(feedback.c.question_id, func.sum(feedback.c.rating), func.count(feedback.c.id),
+               *[func.sum(case((feedback.c.rating == rating, 1), else_=0)) for rating in RATINGS],
+               func.max(feedback.c.added_at)).group_by(feedback.c.question_id)
+    ))
+    await session.commit()
+
+
+async def rebuild_stats() -> None:
+    async with async_session_maker() as session:
+        await rebuild_author_stats_db(session=session)
+        await rebuild_question_stats_db(session=session)
+
+
+def main() -> None:
+    asyncio.run(rebuild_stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Columns of questions added before the columns existed are filled by one-off job, run it from src directory before
+relying on them:
+    python -m api.question.question_backfill
+
+Questions are read and updated chunk by chunk in id order, every chunk is committed separately, so the job can be
+stopped and run again, it continues with rows that are still empty
+"""
+import asyncio
+from typing import NamedTuple
+
+from sqlalchemy import select, update, bindparam
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.question.question_models import question
+from api.question.question_service import get_question_fingerprint, get_search_text
+from db.database import async_session_maker
+
+BACKFILL_CHUNK_SIZE = 1000
+
+
+class FingerprintCollision(NamedTuple):
+    question_id: int
+    # Question that already has the same fingerprint
+    duplicate_of: int
+
+
+async def backfill_fingerprints_db(session: AsyncSession) -> list[FingerprintCollision]:
+    """
+    Fill fingerprints of questions that have none. Fingerprint is unique, so question whose fingerprint is already
+    taken keeps NULL and is reported, it should be deleted or edited by admin
+    :returns: questions that duplicate other questions
+    """
+    collisions = []
+    after_id = 0
+
+    while True:
+        result_proxy = await session.execute(
+            select(question.c.id, question.c.question_title, question.c.choices).
+            where(question.c.fingerprint.is_(None), question.c.id > after_id).
+            order_by(question.c.id).limit(BACKFILL_CHUNK_SIZE)
+        )
+        rows = result_proxy.all()
+
+        if not rows:
+            return collisions
+
+        after_id = rows[-1].id
+        fingerprints = {row.id: get_question_fingerprint(question_title=row.question_title, choices=row.choices)
+                        for row in rows}
+
+        result_proxy = await session.execute(
+            select(question.c.id, question.c.fingerprint).
+            where(question.c.fingerprint.in_(set(fingerprints.values())))
+        )
+        owners = {row.fingerprint: row.id for row in result_proxy}
+        values = []
+
+        for question_id, fingerprint in fingerprints.items():
+            if fingerprint in owners:
+                collisions.append(FingerprintCollision(question_id=question_id, duplicate_of=owners[fingerprint]))
+                continue
+
+            # The oldest question of duplicates in the chunk keeps the fingerprint
+            owners[fingerprint] = question_id
+            values.append({"question_id": question_id, "question_fingerprint": fingerprint})
+
+        if values:
+            await session.execute(
+                update(question).where(question.c.id == bindparam("question_id")).
+                values(fingerprint=bindparam("question_fingerprint")),
+                values
+            )
+
+        await session.commit()
+
+
+async def backfill_search_text_db(session: AsyncSession) -> int:
+    """
+    Fill search text of questions that have none, full-text search doesn't find them before
+    :returns: number of filled questions
+    """
+    filled = 0
+    after_id = 0
+
+    while True:
+        result_proxy = await session.execute(
+            select(question.c.id, question.c.question_title, question.c.choices, question.c.reference).
+            where(question.c.search_text.is_(None), question.c.id > after_id).
+            order_by(question.c.id).limit(BACKFILL_CHUNK_SIZE)
+        )
+        rows = result_proxy.all()
+
+        if not rows:
+            return filled
+
+        after_id = rows[-1].id
+        values = [{"question_id": row.id,
+                   "question_search_text": get_search_text(question_title=row.question_title, choices=row.choices,
+                                                           reference=row.reference)}
+                  for row in rows]
+
+        await session.execute(
+            update(question).where(question.c.id == bindparam("question_id")).
+            values(search_text=bindparam("question_search_text")),
+            values
+        )
+        await session.commit()
+
+        filled += len(rows)
+
+
+async def backfill() -> None:
+    async with async_session_maker() as session:
+        collisions = await backfill_fingerprints_db(session=session)
+        filled = await backfill_search_text_db(session=session)
+
+    print(f"Search text is filled for {filled} questions")
+
+    for collision in collisions:
+        print(f"Question {collision.question_id} duplicates question {collision.duplicate_of}, it has no fingerprint")
+
+
+def main() -> None:
+    asyncio.run(backfill())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+import logging
+from collections import OrderedDict
+from typing import NamedTuple
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from redis.exceptions import RedisError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.question.question_models import question
+from db.redis_client import redis_client
+
+# Fingerprint and search text are used only for lookups, they aren't part of payload
+_PAYLOAD_COLUMNS = [column for column in question.c if column.name not in ("fingerprint", "search_text")]
+
+logger = logging.getLogger(__name__)
+
+
+class CachedQuestion(NamedTuple):
+    version: int
+    payload: dict
+    # Payload serialized once, it is stored in redis and spliced into responses
+    fragment: bytes
+
+
+class QuestionCache:
+    def __init__(self, max_size: int = 50_000, ttl: int = 3600 * 24, chunk_size: int = 500):
+        """
+        Two tiers cache of questions payloads, in-process LRU in front of redis. Payloads are immutable for
+        every version of the question, so redis keys never need invalidation and only expire
+        :param max_size: how many questions are kept in process, least recently used are removed first
+        :param ttl: how much time(seconds) payload is kept in redis
+        :param chunk_size: the most ids in one IN query of missing payloads
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.chunk_size = chunk_size
+        self._questions: OrderedDict[int, CachedQuestion] = OrderedDict()
+
+    @staticmethod
+    def _key(question_id: int, version: int) -> str:
+        return f"question:{question_id}:{version}"
+
+    def _get(self, question_id: int, version: int | None) -> dict | None:
+        cached = self._questions.get(question_id)
+
+        # Unknown version can't be validated, so it is always read from db
+        if cached is None or version is None or cached.version != version:
+            return None
+
+        self._questions.move_to_end(question_id)
+
+        return cached.payload
+
+    def _add(self, question_id: int, version: int, payload: dict, fragment: bytes) -> None:
+        self._questions[question_id] = CachedQuestion(version=version, payload=payload, fragment=fragment)
+        self._questions.move_to_end(question_id)
+
+        while len(self._questions) > self.max_size:
+            self._questions.popitem(last=False)
+
+    def serialize(self, questions: list[dict]) -> bytes:
+        """Serialize payloads into json array of pre-serialized fragments, payloads must come from this cache"""
+        fragments = []
+
+        for payload in questions:
+            cached = self._questions.get(payload["id"])
+
+            if cached is not None and cached.version == payload["version"]:
+                fragments.append(cached.fragment)
+            else:
+                fragments.append(orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS))
+
+        return b"[" + b",".join(fragments) + b"]"
+
+    def invalidate(self, question_id: int) -> None:
+        self._questions.pop(question_id, None)
+
+    def clear(self) -> None:
+        self._questions.clear()
+
+    async def fetch_many(
+            self,
+            questions_ids: list[int],
+            session: AsyncSession,
+            versions: list[int | None] = None,
+    ) -> list[dict | None]:
+        """
+        Get questions payloads in the same order, looking up process cache, then redis, then db. Redis is skipped
+        while it is unavailable
+        :param questions_ids: ids of questions
+        :param versions: current versions of questions in the same order, None for unknown version
+        :returns: payloads in the same order, None for questions that don't exist
+        """
+        if versions is None:
+            versions = [None] * len(questions_ids)
+
+        payloads = {}
+        redis_ids = []
+
+        for question_id, version in zip(questions_ids, versions):
+            payload = self._get(question_id=question_id, version=version)
+
+            if payload is not None:
+                payloads[question_id] = payload
+
+            elif version is not None:
+                redis_ids.append((question_id, version))
+
+        if redis_ids:
+            try:
+                values = await redis_client.mget([self._key(question_id, version)
+                                                  for question_id, version in redis_ids])
+
+            except RedisError:
+                logger.warning("Redis is unavailable, questions payloads are read from db")
+                values = [None] * len(redis_ids)
+
+            for (question_id, version), value in zip(redis_ids, values):
+                if value is not None:
+                    payloads[question_id] = orjson.loads(value)
+                    self._add(question_id=question_id, version=version, payload=payloads[question_id], fragment=value)
+
+        missing_ids = list({question_id for question_id in questions_ids if question_id not in payloads})
+
+        for start in range(0, len(missing_ids), self.chunk_size):
+            query = select(*_PAYLOAD_COLUMNS).where(question.c.id.in_(missing_ids[start:start + self.chunk_size]))
+            result_proxy = await session.execute(query)
+
+            fragments = {}
+
+            for row in result_proxy.mappings():
+                payload = jsonable_encoder(dict(row))
+                # Columns names can be str subclasses that orjson rejects without this option
+                fragment = orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+                payloads[row["id"]] = payload
+
+                self._add(question_id=row["id"], version=row["version"], payload=payload, fragment=fragment)
+                fragments[self._key(row["id"], row["version"])] = fragment
+
+            try:
+                async with redis_client.pipeline(transaction=False) as pipe:
+                    for key, fragment in fragments.items():
+                        pipe.set(key, fragment, ex=self.ttl)
+
+                    await pipe.execute()
+
+            except RedisError:
+                logger.warning("Redis is unavailable, questions payloads weren't cached in it")
+
+        return [payloads.get(question_id) for question_id in questions_ids]
+
+
+question_cache = QuestionCache()
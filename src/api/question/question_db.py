@@ -1,61 +1,89 @@
 import itertools
+from typing import NamedTuple
 
-from sqlalchemy import select, update, insert, delete
+from sqlalchemy import select, update, insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from api.question.question_cache import question_cache
 from api.question.question_models import question
-from api.question.question_schemas import QuestionUpdate, QuestionCreate
+from api.question.question_schemas import QuestionUpdate, QuestionCreate, QuestionsFilter
+from api.question.question_search import search_index
+from api.question.question_service import get_question_fingerprint, get_search_text
+from api.question.question_similarity import similarity_index
+from api.quiz.quiz_index import question_index
+from utilties.custom_exceptions import DuplicatedQuestionException, EmptyQuestionsFilter
 from utilties.result_into_list import ResultIntoList
 
+QUESTIONS_PAGE_SIZE = 10
+# Quiz has at most 50 questions, so longer lists of requested questions are rejected
+BATCH_MAX_QUESTIONS = 100
+# The most questions changed by one statement of bulk update
+BULK_CHUNK_SIZE = 1000
 
-async def get_questions_id_db(user_id: int, session: AsyncSession, page: int = 1):
-    # get questions by user_id
 
-    page -= 1
-    page *= 10
+class QuestionsPage(NamedTuple):
+    questions: list[dict]
+    # Id of the last row that the query returned, None if the page isn't full so there is nothing after it
+    last_id: int | None
+
 
-    query = select(question).where(question.c.added_by == user_id).order_by(question.c.id).slice(page, page + 10)
+async def _get_cached_questions(query, session: AsyncSession) -> QuestionsPage:
+    """
+    Execute query that selects ids and versions of questions and get their payloads from cache. The next page starts
+    after the last selected row, even if questions were deleted after it was selected
+    """
     result_proxy = await session.execute(query)
+    rows = result_proxy.all()
 
-    result = ResultIntoList(result_proxy=result_proxy)
-    result = list(itertools.chain(result.parse()))
+    questions = await question_cache.fetch_many(questions_ids=[row.id for row in rows], session=session,
+                                                versions=[row.version for row in rows])
 
-    return result
+    return QuestionsPage(questions=[payload for payload in questions if payload is not None],
+                         last_id=rows[-1].id if len(rows) == QUESTIONS_PAGE_SIZE else None)
 
 
-async def get_questions_section_db(show_inactive: False, page: int, section_id: int, session: AsyncSession):
-    # get questions by section_id
+def _paginate(query, page: int, after_id: int = None):
+    """Continue after the last returned id if cursor is given, otherwise skip previous pages"""
+    if after_id is not None:
+        return query.where(question.c.id > after_id).order_by(question.c.id).limit(QUESTIONS_PAGE_SIZE)
 
-    page -= 1
-    page *= 10
+    offset = (page - 1) * QUESTIONS_PAGE_SIZE
 
-    if not show_inactive:
-        question_list_query = select(question). \
-            filter(question.c.section_id == section_id, question.c.active == 1).order_by(question.c.id) \
-            .slice(page, page + 10)
-    else:
-        question_list_query = select(question). \
-            filter(question.c.section_id == section_id).order_by(question.c.id) \
-            .slice(page, page + 10)
+    return query.order_by(question.c.id).slice(offset, offset + QUESTIONS_PAGE_SIZE)
 
-    result_proxy = await session.execute(question_list_query)
 
-    result = ResultIntoList(result_proxy=result_proxy)
-    result = list(itertools.chain(result.parse()))
+async def get_questions_id_db(
+        user_id: int,
+        session: AsyncSession,
+        page: int = 1,
+        after_id: int = None
+) -> QuestionsPage:
+    # get questions by user_id
 
-    return result
+    query = select(question.c.id, question.c.version).where(question.c.added_by == user_id)
 
+    return await _get_cached_questions(query=_paginate(query, page=page, after_id=after_id), session=session)
 
-async def get_questions_title_db(question_title: str, session: AsyncSession):
-    # get questions by question_title
 
-    query = select(question).where(question.c.question_title == question_title)
-    result_proxy = await session.execute(query)
+async def get_questions_section_db(
+        show_inactive: False,
+        page: int,
+        section_id: int,
+        session: AsyncSession,
+        after_id: int = None
+) -> QuestionsPage:
+    # get questions by section_id
 
-    result = ResultIntoList(result_proxy=result_proxy)
-    result = list(itertools.chain(result.parse()))
+    if not show_inactive:
+        question_list_query = select(question.c.id, question.c.version). \
+            filter(question.c.section_id == section_id, question.c.active == 1)
+    else:
+        question_list_query = select(question.c.id, question.c.version). \
+            filter(question.c.section_id == section_id)
 
-    return result
+    return await _get_cached_questions(query=_paginate(question_list_query, page=page, after_id=after_id),
+                                       session=session)
 
 
 async def get_question_id_db(question_id: int, session: AsyncSession):
@@ -70,27 +98,188 @@ async def get_question_id_db(question_id: int, session: AsyncSession):
     return result_question
 
 
+async def get_legacy_fingerprints_db(
+        questions_titles: list[str],
+        session: AsyncSession,
+        question_id: int = None,
+) -> set[str]:
+    """
+    Fingerprints of questions that have no fingerprint yet, they were added before fingerprints existed and aren't
+    covered by unique index until question_backfill job fills them. They are found by equal title as before
+    :param question_id: question that is excluded, it is the patched one
+    """
+    if not questions_titles:
+        return set()
+
+    query = select(question.c.question_title, question.c.choices). \
+        where(question.c.fingerprint.is_(None), question.c.question_title.in_(questions_titles))
+
+    if question_id is not None:
+        query = query.where(question.c.id != question_id)
+
+    result_proxy = await session.execute(query)
+
+    return {get_question_fingerprint(question_title=row.question_title, choices=row.choices) for row in result_proxy}
+
+
+async def _execute_unique(stmt, fingerprint: str, question_title: str, session: AsyncSession, question_id: int = None):
+    """Execute insert or update, raise DuplicatedQuestionException if fingerprint of another question conflicts"""
+    if fingerprint in await get_legacy_fingerprints_db(questions_titles=[question_title], session=session,
+                                                       question_id=question_id):
+        raise DuplicatedQuestionException
+
+    try:
+        result = await session.execute(stmt)
+        await session.commit()
+
+    except IntegrityError:
+        await session.rollback()
+
+        if await get_questions_duplicated_db(fingerprint=fingerprint, question_id=question_id, session=session):
+            raise DuplicatedQuestionException
+
+        raise
+
+    return result
+
+
 async def update_question_db(question_id: int, question_update: QuestionUpdate, session: AsyncSession):
     # Update question by question_id
 
-    stmt = update(question).values(**question_update.model_dump()).where(question.c.id == question_id)
-    await session.execute(stmt)
-    await session.commit()
+    fingerprint = get_question_fingerprint(question_title=question_update.question_title,
+                                           choices=question_update.choices)
+    search_text = get_search_text(question_title=question_update.question_title, choices=question_update.choices,
+                                  reference=question_update.reference)
+    stmt = update(question). \
+        values(**question_update.model_dump(), fingerprint=fingerprint, search_text=search_text,
+               version=question.c.version + 1). \
+        where(question.c.id == question_id)
+    await _execute_unique(stmt=stmt, fingerprint=fingerprint, question_title=question_update.question_title,
+                          session=session, question_id=question_id)
+
+    search_index.upsert(question_id=question_id, search_text=search_text, active=question_update.active)
+
+    similarity_index.add(question_id=question_id, question_title=question_update.question_title,
+                         choices=question_update.choices)
+
+    await question_index.refresh_question(question_id=question_id, session=session)
+    question_cache.invalidate(question_id=question_id)
 
 
 async def update_question_active_db(question_id: int, session: AsyncSession):
     # Update question by set active bool to False
 
-    stmt = update(question).values(active=False).where(question.c.id == question_id)
+    stmt = update(question).values(active=False, version=question.c.version + 1).where(question.c.id == question_id)
     await session.execute(stmt)
     await session.commit()
 
+    question_index.discard(question_id=question_id)
+    question_cache.invalidate(question_id=question_id)
+    search_index.set_active(questions_ids=[question_id], active=False)
+
+
+def _get_filter_conditions(questions_filter: QuestionsFilter) -> list:
+    """
+    Build where clause of questions filter
+    :raises EmptyQuestionsFilter: if no criterion is given, so the whole bank can't be changed by mistake
+    """
+    conditions = []
+
+    if questions_filter.questions_ids is not None:
+        conditions.append(question.c.id.in_(questions_filter.questions_ids))
+
+    if questions_filter.section_id is not None:
+        conditions.append(question.c.section_id == questions_filter.section_id)
 
-async def get_questions_duplicated_db(question_title: str, question_id: int, session: AsyncSession):
-    # get duplicated questions
+    if questions_filter.added_by is not None:
+        conditions.append(question.c.added_by == questions_filter.added_by)
+
+    if questions_filter.added_from is not None:
+        conditions.append(question.c.added_at >= questions_filter.added_from)
+
+    if questions_filter.added_to is not None:
+        conditions.append(question.c.added_at < questions_filter.added_to)
+
+    if not conditions:
+        raise EmptyQuestionsFilter
+
+    return conditions
+
+
+async def set_questions_active_db(questions_filter: QuestionsFilter, active: bool, session: AsyncSession) -> int:
+    """
+    Activate or deactivate all questions matching filter, questions that already have this state aren't touched.
+    They are updated in chunks by id and every chunk is committed separately, so locks are held shortly
+    :returns: number of changed questions
+    """
+    conditions = _get_filter_conditions(questions_filter=questions_filter)
+    changed_rows = []
+    last_id = 0
+
+    try:
+        while True:
+            query = select(question.c.id). \
+                where(*conditions, question.c.active != active, question.c.id > last_id). \
+                order_by(question.c.id).limit(BULK_CHUNK_SIZE)
+            result_proxy = await session.execute(query)
+            questions_ids = result_proxy.scalars().all()
+
+            if not questions_ids:
+                break
+
+            stmt = update(question).values(active=active, version=question.c.version + 1). \
+                where(question.c.id.in_(questions_ids), question.c.active != active)
+            await session.execute(stmt)
+
+            # Read rows back, the quiz index needs their new versions
+            result_proxy = await session.execute(
+                select(question.c.id, question.c.section_id, question.c.added_by, question.c.version).
+                where(question.c.id.in_(questions_ids), question.c.active == active)
+            )
+            rows = result_proxy.all()
+            await session.commit()
+
+            changed_rows.extend(rows)
+            last_id = questions_ids[-1]
+
+            if len(questions_ids) < BULK_CHUNK_SIZE:
+                break
+
+    finally:
+        # Committed chunks are applied to caches even if a later chunk failed
+        _apply_questions_active(rows=changed_rows, active=active)
+
+    return len(changed_rows)
+
+
+def _apply_questions_active(rows: list, active: bool) -> None:
+    """Apply changed state of questions to quiz index and caches of this worker in one step"""
+    if not rows:
+        return None
+
+    questions_ids = [row.id for row in rows]
+
+    if not active:
+        question_index.discard_many(questions_ids=questions_ids)
+
+    elif question_index.is_loaded:
+        question_index.upsert_many(questions_ids=questions_ids, section_ids=[row.section_id for row in rows],
+                                   added_by=[row.added_by for row in rows], versions=[row.version for row in rows])
+
+    for question_id in questions_ids:
+        question_cache.invalidate(question_id=question_id)
+
+    search_index.set_active(questions_ids=questions_ids, active=active)
+
+
+async def get_questions_duplicated_db(fingerprint: str, session: AsyncSession, question_id: int = None):
+    # get questions with the same fingerprint except question_id, it is one probe of unique index
+
+    query = select(question).where(question.c.fingerprint == fingerprint)
+
+    if question_id is not None:
+        query = query.where(question.c.id != question_id)
 
-    query = select(question).where(question.c.question_title == question_title and
-                                   question.c.id != question_id)
     result_proxy = await session.execute(query)
     result = ResultIntoList(result_proxy=result_proxy)
     result = list(itertools.chain(result.parse()))
@@ -98,31 +287,66 @@ async def get_questions_duplicated_db(question_title: str, question_id: int, ses
 
 
 async def insert_question_db(question_create: QuestionCreate, session: AsyncSession):
-    stmt = insert(question).values(**question_create.model_dump())
-    await session.execute(stmt)
-    await session.commit()
+    # Duplicates are rejected by unique fingerprint index, so concurrent inserts can't add the same question
 
+    fingerprint = get_question_fingerprint(question_title=question_create.question_title,
+                                           choices=question_create.choices)
+    search_text = get_search_text(question_title=question_create.question_title, choices=question_create.choices,
+                                  reference=question_create.reference)
+    stmt = insert(question).values(**question_create.model_dump(), fingerprint=fingerprint, search_text=search_text)
+    result = await _execute_unique(stmt=stmt, fingerprint=fingerprint, question_title=question_create.question_title,
+                                   session=session)
+    question_id = result.inserted_primary_key[0]
 
-async def delete_question_db(question_id: int, session: AsyncSession):
-    # delete question by id
-    stmt = delete(question).where(question.c.id == question_id)
-    await session.execute(stmt)
-    await session.commit()
+    search_index.upsert(question_id=question_id, search_text=search_text, active=question_create.active,
+                        section_id=question_create.section_id)
 
+    await question_index.refresh_question(question_id=question_id, session=session)
+    similarity_index.add(question_id=question_id, question_title=question_create.question_title,
+                         choices=question_create.choices)
 
-async def delete_all_questions_db(user_id: int, session: AsyncSession):
-    """Delete all questions for user"""
-    stmt = delete(question).where(question.c.added_by == user_id)
-    await session.execute(stmt)
-    await session.commit()
 
+def discard_questions(questions_ids: list[int]) -> None:
+    """Forget deleted questions in indexes and cache of this worker, call it after deletion is committed"""
+    question_index.discard_many(questions_ids=questions_ids)
+    search_index.discard(questions_ids=questions_ids)
 
-async def get_question_ref(list_questions: list, session: AsyncSession):
-    # get references of questions by id
-    query = select(question).where(question.c.id.in_(list_questions), question.c.reference_link != "")
+    for question_id in questions_ids:
+        question_cache.invalidate(question_id=question_id)
+        similarity_index.discard(question_id=question_id)
 
-    result_proxy = await session.execute(query)
-    result = ResultIntoList(result_proxy=result_proxy)
-    result = list(itertools.chain(result.parse()))
 
-    return result
+async def get_questions_authors_db(questions_ids: list[int], session: AsyncSession) -> dict[int, int]:
+    """Get authors of questions by one query, questions that don't exist are missing"""
+    if not questions_ids:
+        return {}
+
+    result_proxy = await session.execute(
+        select(question.c.id, question.c.added_by).where(question.c.id.in_(questions_ids))
+    )
+
+    return {row.id: row.added_by for row in result_proxy}
+
+
+async def get_questions_batch_db(
+        questions_ids: list[int],
+        session: AsyncSession,
+        show_inactive: bool = False,
+) -> list[dict]:
+    """
+    Get questions in the requested order without repeats, questions that don't exist are skipped. Versions of
+    active questions are known by quiz index, so their payloads come from cache, the rest is read in one query
+    :param show_inactive: return inactive questions too
+    """
+    questions_ids = list(dict.fromkeys(questions_ids))
+    questions = await question_cache.fetch_many(questions_ids=questions_ids, session=session,
+                                                versions=question_index.get_versions(questions_ids))
+
+    return [payload for payload in questions if payload is not None and (show_inactive or payload["active"])]
+
+
+async def get_question_ref(list_questions: list[int], session: AsyncSession) -> list[dict]:
+    """Get questions that have reference link, in the requested order without repeats"""
+    questions = await get_questions_batch_db(questions_ids=list_questions, session=session, show_inactive=True)
+
+    return [payload for payload in questions if payload["reference_link"]]
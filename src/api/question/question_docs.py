@@ -47,6 +47,58 @@ ADD_QUESTION_RESPONSES: OpenAPIResponseType = {
         }
     },
 }
+IMPORT_QUESTIONS_RESPONSES: OpenAPIResponseType = {
+    status.HTTP_400_BAD_REQUEST: {
+        "model": ErrorModel,
+        "content": {
+            "application/json": {
+                "examples": {ErrorCode.INVALID_FILE_FORMAT: {
+                    "summary": "File isn't utf-8 .jsonl or .csv file with required columns",
+                    "value": {"detail": ErrorCode.INVALID_FILE_FORMAT},
+                }
+                }
+            },
+        },
+    },
+    status.HTTP_405_METHOD_NOT_ALLOWED: {
+        "model": ErrorModel,
+        "content": {
+            "application/json": {
+                "examples": {ErrorCode.USER_NOT_ADMIN_SUPERVISOR: {
+                    "summary": "Only supervisor or admin_panel can enter or patch quizzes",
+                    "value": {"detail": ErrorCode.USER_NOT_ADMIN_SUPERVISOR},
+                }
+                }
+            },
+        },
+    },
+}
+SEARCH_QUESTIONS_RESPONSES: OpenAPIResponseType = {
+    status.HTTP_400_BAD_REQUEST: {
+        "model": ErrorModel,
+        "content": {
+            "application/json": {
+                "examples": {ErrorCode.INVALID_CURSOR: {
+                    "summary": "Cursor is damaged, use next_cursor of previous page",
+                    "value": {"detail": ErrorCode.INVALID_CURSOR},
+                }
+                }
+            },
+        },
+    },
+    status.HTTP_405_METHOD_NOT_ALLOWED: {
+        "model": ErrorModel,
+        "content": {
+            "application/json": {
+                "examples": {ErrorCode.USER_NOT_ADMIN_SUPERVISOR: {
+                    "summary": "Only supervisor or admin_panel can search questions",
+                    "value": {"detail": ErrorCode.USER_NOT_ADMIN_SUPERVISOR},
+                }
+                }
+            },
+        },
+    },
+}
 PATCH_QUESTION_RESPONSES: OpenAPIResponseType = {
     status.HTTP_400_BAD_REQUEST: {
         "model": ErrorModel,
@@ -118,6 +170,10 @@ GET_QUESTION_RESPONSES: OpenAPIResponseType = {
                     ErrorCode.INVALID_PAGE: {
                         "summary": "Invalid page",
                         "value": {"detail": ErrorCode.INVALID_PAGE},
+                    },
+                    ErrorCode.INVALID_CURSOR: {
+                        "summary": "Cursor is damaged, use next_cursor of previous page",
+                        "value": {"detail": ErrorCode.INVALID_CURSOR},
                     }
                 }
             },
@@ -137,6 +193,10 @@ GET_QUESTION_SECTION_RESPONSES: OpenAPIResponseType = {
                     ErrorCode.INVALID_PAGE: {
                         "summary": "Invalid page",
                         "value": {"detail": ErrorCode.INVALID_PAGE},
+                    },
+                    ErrorCode.INVALID_CURSOR: {
+                        "summary": "Cursor is damaged, use next_cursor of previous page",
+                        "value": {"detail": ErrorCode.INVALID_CURSOR},
                     }
                 }
             },
@@ -206,6 +266,55 @@ DELETE_QUESTION_RESPONSES: OpenAPIResponseType = {
     }
 }
 
+BULK_ACTIVE_QUESTIONS_RESPONSES: OpenAPIResponseType = {
+    status.HTTP_400_BAD_REQUEST: {
+        "model": ErrorModel,
+        "content": {
+            "application/json": {
+                "examples": {ErrorCode.EMPTY_QUESTIONS_FILTER: {
+                    "summary": "No ids, section, author or date range are given",
+                    "value": {"detail": ErrorCode.EMPTY_QUESTIONS_FILTER},
+                }
+                }
+            },
+        },
+    },
+    status.HTTP_401_UNAUTHORIZED: {
+        "model": ErrorModel,
+        "content": {
+            "application/json": {
+                "examples": {
+                    ErrorCode.USER_INACTIVE: {
+                        "summary": "Missing token or inactive user.",
+                        "value": {"detail": "Unauthorized"
+                                  },
+                    }
+                }
+            },
+        },
+    },
+    status.HTTP_403_FORBIDDEN: {
+        "model": ErrorModel,
+        "content": {
+            "application/json": {
+                "examples": {
+                    ErrorCode.USER_NOT_AUTHENTICATED: {
+                        "summary": "Not authenticated",
+                        "value": {"detail": "Not authenticated"},
+                    },
+                    ErrorCode.FORBIDDEN: {
+                        "summary": "Not superuser",
+                        "value": {"detail": ErrorCode.FORBIDDEN},
+                    }
+                }
+            },
+        },
+    },
+    status.HTTP_500_INTERNAL_SERVER_ERROR: {
+        "description": "Internal sever error.",
+    }
+}
+
 ADD_QUESTION_RESPONSES.update(SERVER_ERROR_AUTHORIZED_RESPONSE)
 PATCH_QUESTION_RESPONSES.update(SERVER_ERROR_AUTHORIZED_RESPONSE)
 GET_QUESTION_RESPONSES.update(SERVER_ERROR_AUTHORIZED_RESPONSE)
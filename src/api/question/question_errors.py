@@ -32,6 +32,21 @@ class Errors(NamedTuple):
         detail=ErrorCode.INVALID_PAGE
     )
 
+    invalid_cursor_400 = HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=ErrorCode.INVALID_CURSOR
+    )
+
+    invalid_file_format_400 = HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=ErrorCode.INVALID_FILE_FORMAT
+    )
+
+    empty_questions_filter_400 = HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=ErrorCode.EMPTY_QUESTIONS_FILTER
+    )
+
     question_not_found_404 = HTTPException(
         status_code=status.HTTP_404_NOT_FOUND,
         detail=ErrorCode.QUESTION_NOT_FOUND
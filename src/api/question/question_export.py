@@ -0,0 +1,77 @@
+import csv
+import io
+from enum import Enum
+from typing import AsyncIterator
+
+import orjson
+from sqlalchemy import select
+
+from api.question.question_models import question
+from db.database import async_session_maker
+
+EXPORT_CHUNK_SIZE = 1000
+
+# Choices are exported in separate columns as import expects them
+CSV_HEADER = ("id", "question_title", "choice_1", "choice_2", "choice_3", "choice_4", "answer", "reference",
+              "reference_link", "added_by", "added_at", "section_id", "active")
+
+_EXPORT_COLUMNS = [column for column in question.c if column.name not in ("fingerprint", "search_text", "version")]
+
+
+class ExportFormat(str, Enum):
+    JSONL = "jsonl"
+    CSV = "csv"
+
+
+def _csv_chunk(rows: list, header: bool) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    if header:
+        writer.writerow(CSV_HEADER)
+
+    for row in rows:
+        choices = (list(row.choices) + [""] * 4)[:4]
+        writer.writerow([row.id, row.question_title, *choices, row.answer, row.reference, row.reference_link or "",
+                         row.added_by, row.added_at.isoformat() if row.added_at else "", row.section_id,
+                         int(row.active)])
+
+    return buffer.getvalue().encode()
+
+
+def _jsonl_chunk(rows: list) -> bytes:
+    return b"".join(orjson.dumps(dict(row._mapping), option=orjson.OPT_NON_STR_KEYS) + b"\n" for row in rows)
+
+
+async def export_questions(
+        file_format: ExportFormat,
+        section_id: int = None,
+        added_by: int = None,
+        active: bool = None,
+) -> AsyncIterator[bytes]:
+    """
+    Stream questions ordered by id in chunks read from server-side cursor, so memory doesn't depend on bank size.
+    Export has its own session because it is read after the request handler returns
+    :param section_id: export only questions of this section
+    :param added_by: export only questions of this author
+    :param active: export only active or inactive questions, None for all
+    """
+    query = select(*_EXPORT_COLUMNS).order_by(question.c.id)
+
+    if section_id is not None:
+        query = query.where(question.c.section_id == section_id)
+
+    if added_by is not None:
+        query = query.where(question.c.added_by == added_by)
+
+    if active is not None:
+        query = query.where(question.c.active == active)
+
+    async with async_session_maker() as session:
+        result = await session.stream(query.execution_options(yield_per=EXPORT_CHUNK_SIZE))
+
+        if file_format == ExportFormat.CSV:
+            yield _csv_chunk(rows=[], header=True)
+
+        async for rows in result.partitions():
+            yield _csv_chunk(rows=rows, header=False) if file_format == ExportFormat.CSV else _jsonl_chunk(rows)
@@ -0,0 +1,263 @@
+import csv
+import io
+import itertools
+import json
+from typing import IO, Iterator, NamedTuple
+
+from pydantic import ValidationError
+from sqlalchemy import select, insert
+from sqlalchemy.exc import IntegrityError, DataError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.question.question_db import get_legacy_fingerprints_db
+from api.question.question_models import question
+from api.question.question_schemas import QuestionRead, QuestionCreate
+from api.question.question_search import search_index
+from api.question.question_service import (
+    check_question_validity_user_grants,
+    get_question_fingerprint,
+    get_search_text
+)
+from api.question.question_similarity import similarity_index
+from utilties.custom_exceptions import InvalidFileFormat, NumberOfChoicesNotFour, AnswerNotIncluded
+from utilties.error_code import ErrorCode
+
+IMPORT_CHUNK_SIZE = 500
+
+# Columns of csv file, choices are given in separate columns
+CSV_COLUMNS = ("question_title", "choice_1", "choice_2", "choice_3", "choice_4", "answer", "reference",
+               "reference_link")
+
+# Text fields are checked against lengths of their columns, too long value fails the whole chunk otherwise
+_LIMITED_FIELDS = ("question_title", "answer", "reference", "reference_link")
+
+_ROW_ERRORS = {
+    NumberOfChoicesNotFour: ErrorCode.NUMBER_OF_CHOICES_NOT_FOUR,
+    AnswerNotIncluded: ErrorCode.ANSWER_NOT_INCLUDED_IN_CHOICES,
+}
+
+
+class ImportRow(NamedTuple):
+    # Number of row in file starting from 1, header of csv isn't counted
+    number: int
+    data: dict | None
+    error: str | None = None
+
+
+class RowError(NamedTuple):
+    row: int
+    detail: str
+
+
+class ImportReport(NamedTuple):
+    imported: int
+    errors: list[RowError]
+
+
+def _read_jsonl(file: IO[str]) -> Iterator[ImportRow]:
+    for number, line in enumerate(file, start=1):
+        if not line.strip():
+            continue
+
+        try:
+            data = json.loads(line)
+        except ValueError:
+            yield ImportRow(number=number, data=None, error=ErrorCode.INVALID_IMPORT_ROW)
+            continue
+
+        if not isinstance(data, dict):
+            yield ImportRow(number=number, data=None, error=ErrorCode.INVALID_IMPORT_ROW)
+            continue
+
+        yield ImportRow(number=number, data=data)
+
+
+def _read_csv(file: IO[str]) -> Iterator[ImportRow]:
+    reader = csv.DictReader(file)
+
+    if reader.fieldnames is None or not set(CSV_COLUMNS[:-1]) <= set(reader.fieldnames):
+        raise InvalidFileFormat
+
+    for number, record in enumerate(reader, start=1):
+        choices = [record.get(f"choice_{index}") or "" for index in range(1, 5)]
+
+        yield ImportRow(number=number, data={
+            "question_title": record["question_title"],
+            "choices": choices,
+            "answer": record["answer"],
+            "reference": record["reference"],
+            "reference_link": record.get("reference_link") or None,
+        })
+
+
+def read_rows(file: IO[bytes], filename: str) -> Iterator[ImportRow]:
+    """
+    Parse uploaded file lazily row by row
+    :param file: binary file, format is chosen by extension of filename, .jsonl or .csv
+    :raises InvalidFileFormat: if extension isn't supported or csv header hasn't required columns
+    """
+    extension = filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+
+    if extension not in ("jsonl", "csv"):
+        raise InvalidFileFormat
+
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+
+    return _read_jsonl(text) if extension == "jsonl" else _read_csv(text)
+
+
+async def _validate_row(row: ImportRow, role_id: int) -> QuestionRead | str:
+    """Apply rules of adding single question, return error code if row is invalid"""
+    if row.error is not None:
+        return row.error
+
+    try:
+        received_question = QuestionRead(**row.data)
+        await check_question_validity_user_grants(received_question=received_question, role_id=role_id)
+
+    except ValidationError:
+        return ErrorCode.INVALID_IMPORT_ROW
+
+    except (NumberOfChoicesNotFour, AnswerNotIncluded) as e:
+        return _ROW_ERRORS[type(e)]
+
+    for field in _LIMITED_FIELDS:
+        value = getattr(received_question, field)
+
+        if value is not None and len(value) > question.c[field].type.length:
+            return ErrorCode.IMPORT_VALUE_TOO_LONG
+
+    return received_question
+
+
+async def _get_existing_fingerprints(values_rows: list[dict], session: AsyncSession) -> set[str]:
+    """
+    Which fingerprints are already in db, it is one query for the whole chunk. Questions without fingerprint aren't
+    backfilled yet, they are found by titles
+    """
+    if not values_rows:
+        return set()
+
+    fingerprints = [values["fingerprint"] for values in values_rows]
+    questions_titles = list({values["question_title"] for values in values_rows})
+
+    result_proxy = await session.execute(
+        select(question.c.fingerprint).where(question.c.fingerprint.in_(fingerprints))
+    )
+    legacy = await get_legacy_fingerprints_db(questions_titles=questions_titles, session=session)
+
+    return set(result_proxy.scalars().all()) | legacy
+
+
+async def _insert_chunk(rows: list[tuple[int, dict]], session: AsyncSession) -> tuple[list[dict], list[RowError]]:
+    """
+    Insert rows by one multi-row statement, rows added concurrently by other requests are reported as duplicates.
+    If db still rejects the chunk, all its rows are reported as not inserted, previous chunks stay committed
+    """
+    errors = []
+
+    for attempt in range(2):
+        existing = await _get_existing_fingerprints([values for _, values in rows], session=session)
+        errors += [RowError(row=number, detail=ErrorCode.QUESTION_DUPLICATED)
+                   for number, values in rows if values["fingerprint"] in existing]
+        rows = [(number, values) for number, values in rows if values["fingerprint"] not in existing]
+
+        if not rows:
+            return [], errors
+
+        try:
+            await session.execute(insert(question), [values for _, values in rows])
+            await session.commit()
+
+            return [values for _, values in rows], errors
+
+        except IntegrityError:
+            # Another request could insert the same question after lookup, look up again and retry once
+            await session.rollback()
+
+            if attempt:
+                break
+
+        except DataError:
+            await session.rollback()
+            break
+
+    return [], errors + [RowError(row=number, detail=ErrorCode.IMPORT_ROW_NOT_INSERTED) for number, _ in rows]
+
+
+async def import_questions(
+        rows: Iterator[ImportRow],
+        added_by: int,
+        section_id: int,
+        role_id: int,
+        session: AsyncSession,
+) -> ImportReport:
+    """
+    Validate, deduplicate and insert questions chunk by chunk, every chunk is committed separately
+    :param rows: parsed rows of uploaded file
+    :param role_id: role of importer, students can't import questions
+    :returns: number of imported questions and errors of rejected rows
+    """
+    imported = 0
+    errors = []
+    # Fingerprints of questions from previous rows, file can repeat the same question
+    seen_fingerprints = set()
+
+    while chunk := list(itertools.islice(rows, IMPORT_CHUNK_SIZE)):
+        values_rows = []
+
+        for row in chunk:
+            received_question = await _validate_row(row=row, role_id=role_id)
+
+            if isinstance(received_question, str):
+                errors.append(RowError(row=row.number, detail=received_question))
+                continue
+
+            fingerprint = get_question_fingerprint(question_title=received_question.question_title,
+                                                   choices=received_question.choices)
+
+            if fingerprint in seen_fingerprints:
+                errors.append(RowError(row=row.number, detail=ErrorCode.QUESTION_DUPLICATED))
+                continue
+
+            seen_fingerprints.add(fingerprint)
+
+            question_create = QuestionCreate(question_title=received_question.question_title,
+                                             choices=list(received_question.choices),
+                                             answer=received_question.answer,
+                                             reference=received_question.reference,
+                                             reference_link=received_question.reference_link,
+                                             added_by=added_by,
+                                             section_id=section_id)
+
+            search_text = get_search_text(question_title=question_create.question_title,
+                                          choices=question_create.choices, reference=question_create.reference)
+
+            values_rows.append((row.number, {**question_create.model_dump(), "fingerprint": fingerprint,
+                                             "search_text": search_text}))
+
+        inserted, chunk_errors = await _insert_chunk(rows=values_rows, session=session)
+
+        imported += len(inserted)
+        errors.extend(chunk_errors)
+
+        if inserted:
+            await _index_inserted(inserted=inserted, session=session)
+
+    errors.sort(key=lambda error: error.row)
+
+    return ImportReport(imported=imported, errors=errors)
+
+
+async def _index_inserted(inserted: list[dict], session: AsyncSession) -> None:
+    """Add imported questions to similarity and search indexes, their ids are read back by fingerprints"""
+    result_proxy = await session.execute(
+        select(question.c.id, question.c.question_title, question.c.choices, question.c.search_text,
+               question.c.section_id, question.c.active).
+        where(question.c.fingerprint.in_([values["fingerprint"] for values in inserted]))
+    )
+
+    for row in result_proxy:
+        similarity_index.add(question_id=row.id, question_title=row.question_title, choices=row.choices)
+        search_index.upsert(question_id=row.id, search_text=row.search_text, active=bool(row.active),
+                            section_id=row.section_id)
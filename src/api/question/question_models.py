@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import Table, Column, Integer, String, TIMESTAMP, MetaData, JSON, ForeignKey, Boolean
+from sqlalchemy import Table, Column, Integer, String, TIMESTAMP, MetaData, JSON, ForeignKey, Boolean, Index, Text
 
 from api.auth.auth_models import user
 
@@ -19,5 +19,15 @@ question = Table(
     Column("added_by", ForeignKey(user.c.id), nullable=False),
     Column("added_at", TIMESTAMP, default=datetime.utcnow),
     Column("section_id", Integer, ForeignKey("section.id"), nullable=False),
-    Column("active", Boolean, default=False, nullable=False)
+    Column("active", Boolean, default=False, nullable=False),
+    # Raised on every update of the question, cached payloads are keyed by it
+    Column("version", Integer, default=1, server_default="1", nullable=False),
+    # sha256 of normalized title and choices, equal questions can't be added twice. Questions added before it
+    # existed get it from question_backfill job
+    Column("fingerprint", String(length=64), nullable=True, unique=True),
+    # Normalized title, choices and reference for full-text search, filled for old questions by question_backfill job
+    Column("search_text", Text, nullable=True),
+    # Keyset pagination of section questions reads this index in id order
+    Index("ix_question_section_id_active_id", "section_id", "active", "id"),
+    Index("ix_question_search_text", "search_text", mysql_prefix="FULLTEXT")
 )
\ No newline at end of file
@@ -1,37 +1,47 @@
-from collections import Counter
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, UploadFile
 from fastapi.security import HTTPBearer
 from starlette import status
+from starlette.requests import Request
+from starlette.responses import Response, StreamingResponse
 
 from api.auth.base_config import current_superuser
-from api.feedback.feedback_db import (
-    check_feedback_question_id,
-    delete_feedback_question_id,
-    get_remaining_time
-)
+from api.feedback.feedback_db import get_remaining_time
+from api.question.question_cache import question_cache
 from api.question.question_db import (
     get_questions_id_db,
     get_questions_section_db,
-    get_questions_title_db,
     update_question_db,
     get_question_id_db,
     insert_question_db,
-    delete_question_db,
     get_question_ref,
-    update_question_active_db
+    get_questions_batch_db,
+    update_question_active_db,
+    set_questions_active_db,
+    QUESTIONS_PAGE_SIZE,
+    QuestionsPage,
+    BATCH_MAX_QUESTIONS
 )
 from api.question.question_docs import (
     ADD_QUESTION_RESPONSES,
     GET_QUESTION_RESPONSES,
     GET_QUESTION_SECTION_RESPONSES,
     PATCH_QUESTION_RESPONSES,
-    DELETE_QUESTION_RESPONSES
+    DELETE_QUESTION_RESPONSES,
+    BULK_ACTIVE_QUESTIONS_RESPONSES,
+    IMPORT_QUESTIONS_RESPONSES,
+    SEARCH_QUESTIONS_RESPONSES
 )
 from api.question.question_errors import Errors as QuestionErrors
-from api.question.question_schemas import QuestionCreate, QuestionRead, QuestionUpdate
+from api.question.question_export import ExportFormat, export_questions
+from api.question.question_import import read_rows, import_questions
+from api.question.question_search import search_questions_db
+from api.question.question_schemas import QuestionCreate, QuestionRead, QuestionUpdate, QuestionsFilter
+from api.question.question_service import check_question_validity_user_grants
+from api.question.question_similarity import SimilarQuestion, similarity_index
 from api.rating.rating_docs import SERVER_ERROR_AUTHORIZED_RESPONSE
 from api.section.section_errors import Errors as SectionErrors
 from api.section.section_service import SectionService
+from core.cascade_delete import delete_question_cascade
 from core.dependecies import UOWDep, CurrentUser, Session
 from utilties.custom_exceptions import (
     DuplicatedQuestionException,
@@ -42,8 +52,13 @@ from utilties.custom_exceptions import (
     InvalidPage,
     QuestionNotFound,
     NotAllowed,
-    QuestionNotEditable
+    QuestionNotEditable,
+    InvalidCursor,
+    InvalidFileFormat,
+    EmptyQuestionsFilter
 )
+from utilties.cursor import encode_cursor, decode_cursor
+from utilties.fast_response import success_response
 
 question_router = APIRouter(
     prefix="/question",
@@ -51,17 +66,21 @@ question_router = APIRouter(
 )
 
 
-async def check_question_validity_user_grants(received_question: QuestionRead, role_id: int):
-    received_question.choices.discard('')  # removing empty string from set
+def get_next_cursor(questions_page: QuestionsPage) -> str | None:
+    """Cursor of the next page, None if the page isn't full so there is nothing after it"""
+    if questions_page.last_id is None:
+        return None
+
+    return encode_cursor(questions_page.last_id)
 
-    if role_id == 1:  # user can't add questions
-        raise UserNotAdminSupervisor
 
-    if len(received_question.choices) != 4:  # checking if question have 4 choices
-        raise NumberOfChoicesNotFour
+def get_similar_details(similar_questions: list[SimilarQuestion]) -> dict | None:
+    """Details of response that warn about near-duplicates of the question"""
+    if not similar_questions:
+        return None
 
-    if received_question.answer not in received_question.choices:  # checking if answer included in choices
-        raise AnswerNotIncluded
+    return {"similar_questions": [{"id": item.question_id, "similarity": round(item.similarity, 2)}
+                                  for item in similar_questions]}
 
 
 @question_router.post("/add", name="question:add question", dependencies=[Depends(HTTPBearer())],
@@ -75,15 +94,6 @@ async def add_question(
 
         await check_question_validity_user_grants(received_question=added_question, role_id=verified_user.role_id)
 
-        questions_with_same_title = await get_questions_title_db(question_title=added_question.question_title,
-                                                                 session=session)
-
-        for element in questions_with_same_title:
-            # checking if duplicated
-            if (Counter(element["choices"]), element["question_title"]) == (Counter(added_question.choices),
-                                                                            added_question.question_title):
-                raise DuplicatedQuestionException
-
         question_create = QuestionCreate(question_title=added_question.question_title,
                                          choices=list(added_question.choices),  # converting set to list
                                          answer=added_question.answer,
@@ -93,11 +103,16 @@ async def add_question(
                                          section_id=verified_user.section_id
                                          )
 
+        # Reworded copies aren't rejected, but supervisor is told about them
+        similar_questions = similarity_index.find_similar(question_title=question_create.question_title,
+                                                          choices=question_create.choices)
+
+        # Raises DuplicatedQuestionException if the same question exists, it is checked by fingerprint index
         await insert_question_db(question_create, session)
 
         return {"status": "success",
                 "data": question_create,
-                "detail": None
+                "detail": get_similar_details(similar_questions)
                 }
 
     except NumberOfChoicesNotFour:
@@ -116,26 +131,98 @@ async def add_question(
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=Exception)
 
 
+@question_router.post("/import", name="question:import questions", dependencies=[Depends(HTTPBearer())],
+                      responses=IMPORT_QUESTIONS_RESPONSES)
+async def import_questions_file(
+        file: UploadFile,
+        verified_user: CurrentUser,
+        session: Session
+) -> dict:
+    """
+    Import questions from .jsonl file of question objects or .csv file with columns question_title, choice_1,
+    choice_2, choice_3, choice_4, answer, reference and reference_link. Valid rows are imported even if other rows
+    are rejected, errors of rejected rows are returned with their numbers
+    """
+    try:
+        if verified_user.role_id == 1:  # user can't add questions
+            raise UserNotAdminSupervisor
+
+        report = await import_questions(rows=read_rows(file=file.file, filename=file.filename or ""),
+                                        added_by=verified_user.id,
+                                        section_id=verified_user.section_id,
+                                        role_id=verified_user.role_id,
+                                        session=session)
+
+        return {"status": "success",
+                "data": {"imported": report.imported,
+                         "rejected": len(report.errors),
+                         "errors": [error._asdict() for error in report.errors]},
+                "detail": None
+                }
+
+    except UserNotAdminSupervisor:
+        raise QuestionErrors.user_not_allowed_405
+
+    except (InvalidFileFormat, UnicodeDecodeError):
+        raise QuestionErrors.invalid_file_format_400
+
+    except Exception:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=Exception)
+
+
+@question_router.get(
+    path="/export",
+    name="question:export questions",
+    dependencies=[Depends(HTTPBearer()), Depends(current_superuser)],
+    responses=SERVER_ERROR_AUTHORIZED_RESPONSE
+)
+async def export_questions_file(
+        file_format: ExportFormat = Query(default=ExportFormat.JSONL),
+        section_id: int | None = Query(default=None, gt=0),
+        added_by: int | None = Query(default=None, gt=0),
+        active: bool | None = Query(default=None),
+) -> StreamingResponse:
+    """Stream questions bank as .jsonl or .csv file, questions are read in chunks so any bank size can be exported"""
+    try:
+        media_type = "text/csv" if file_format == ExportFormat.CSV else "application/x-ndjson"
+
+        return StreamingResponse(
+            content=export_questions(file_format=file_format, section_id=section_id, added_by=added_by,
+                                     active=active),
+            media_type=media_type,
+            headers={"content-disposition": f'attachment; filename="questions.{file_format.value}"'}
+        )
+
+    except Exception:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=Exception)
+
+
 @question_router.get("/me", name="question:get question-mine", dependencies=[Depends(HTTPBearer())],
                      responses=GET_QUESTION_RESPONSES)
 async def get_question_me(
+        request: Request,
         verified_user: CurrentUser,
         session: Session,
         page: int = Query(gt=0, default=1),
-) -> dict:
+        cursor: str | None = Query(default=None, description="next_cursor of previous page, page is ignored with it"),
+) -> Response:
     try:
         if page < 1:
             raise InvalidPage
 
-        result = await get_questions_id_db(page=page, session=session, user_id=verified_user.id)
+        after_id = decode_cursor(cursor)[0] if cursor is not None else None
 
-        return {"status": "success",
-                "data": result,
-                "detail": None}
+        result = await get_questions_id_db(page=page, session=session, user_id=verified_user.id, after_id=after_id)
+
+        return success_response(request=request, data=question_cache.serialize(result.questions),
+                                details={"next_cursor": get_next_cursor(result)}, details_key="detail")
 
     except InvalidPage:
         raise QuestionErrors.invalid_page_number_400
 
+    except InvalidCursor:
+        raise QuestionErrors.invalid_cursor_400
+
     except Exception:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=Exception)
 
@@ -143,16 +230,20 @@ async def get_question_me(
 @question_router.get("/get", name="question:get question", dependencies=[Depends(HTTPBearer())],
                      responses=GET_QUESTION_SECTION_RESPONSES)
 async def get_question_section_id(
+        request: Request,
         uow: UOWDep,
         verified_user: CurrentUser,
         session: Session,
         section_id: int = Query(gt=0),
         page: int = Query(gt=0, default=1),
-) -> dict:
+        cursor: str | None = Query(default=None, description="next_cursor of previous page, page is ignored with it"),
+) -> Response:
     try:
         if page < 1:
             raise InvalidPage
 
+        after_id = decode_cursor(cursor)[0] if cursor is not None else None
+
         await SectionService().get_section_by_id(uow=uow, section_id=section_id)
 
         if verified_user.role_id == 3:
@@ -161,7 +252,8 @@ async def get_question_section_id(
                 show_inactive=True,
                 page=page,
                 section_id=section_id,
-                session=session
+                session=session,
+                after_id=after_id
             )
         else:
             # If user is not admin_panel then return just active questions
@@ -169,16 +261,19 @@ async def get_question_section_id(
                 show_inactive=False,
                 page=page,
                 section_id=section_id,
-                session=session
+                session=session,
+                after_id=after_id
             )
 
-        return {"status": "success",
-                "data": result,
-                "detail": None}
+        return success_response(request=request, data=question_cache.serialize(result.questions),
+                                details={"next_cursor": get_next_cursor(result)}, details_key="detail")
 
     except InvalidPage:
         raise QuestionErrors.invalid_page_number_400
 
+    except InvalidCursor:
+        raise QuestionErrors.invalid_cursor_400
+
     except OutOfSectionIdException:
         raise SectionErrors.invalid_section_400
 
@@ -186,6 +281,77 @@ async def get_question_section_id(
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=Exception)
 
 
+@question_router.get("/batch", name="question:get questions batch", dependencies=[Depends(HTTPBearer())],
+                     responses=SERVER_ERROR_AUTHORIZED_RESPONSE)
+async def get_questions_batch(
+        request: Request,
+        verified_user: CurrentUser,
+        session: Session,
+        ids: list[int] = Query(min_length=1, max_length=BATCH_MAX_QUESTIONS),
+) -> Response:
+    """Get questions by ids in the requested order, ids of questions that aren't found are returned in details"""
+    try:
+        # If user is admin_panel then return inactive questions too
+        result = await get_questions_batch_db(questions_ids=ids, session=session,
+                                              show_inactive=verified_user.role_id == 3)
+
+        found_ids = {payload["id"] for payload in result}
+        not_found = [question_id for question_id in dict.fromkeys(ids) if question_id not in found_ids]
+
+        return success_response(request=request, data=question_cache.serialize(result),
+                                details={"not_found": not_found})
+
+    except Exception:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=Exception)
+
+
+@question_router.get("/search", name="question:search questions", dependencies=[Depends(HTTPBearer())],
+                     responses=SEARCH_QUESTIONS_RESPONSES)
+async def search_questions(
+        request: Request,
+        verified_user: CurrentUser,
+        session: Session,
+        q: str = Query(min_length=3, max_length=200),
+        section_id: int | None = Query(default=None, gt=0),
+        cursor: str | None = Query(default=None, description="next_cursor of previous page"),
+) -> Response:
+    """Search questions by title, choices and reference, the most relevant first"""
+    try:
+        if verified_user.role_id == 1:  # user can't browse questions bank
+            raise UserNotAdminSupervisor
+
+        after = decode_cursor(cursor, size=2) if cursor is not None else None
+
+        results = await search_questions_db(
+            search_query=q,
+            session=session,
+            limit=QUESTIONS_PAGE_SIZE,
+            section_id=section_id,
+            # If user is admin_panel then search all question(active or not)
+            show_inactive=verified_user.role_id == 3,
+            after=after
+        )
+
+        questions = await question_cache.fetch_many(questions_ids=[result.question_id for result in results],
+                                                    session=session)
+        questions = [payload for payload in questions if payload is not None]
+
+        next_cursor = encode_cursor(results[-1].score, results[-1].question_id) \
+            if len(results) == QUESTIONS_PAGE_SIZE else None
+
+        return success_response(request=request, data=question_cache.serialize(questions),
+                                details={"next_cursor": next_cursor}, details_key="detail")
+
+    except UserNotAdminSupervisor:
+        raise QuestionErrors.user_not_allowed_405
+
+    except InvalidCursor:
+        raise QuestionErrors.invalid_cursor_400
+
+    except Exception:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=Exception)
+
+
 @question_router.patch("/patch", name="question: patch question", dependencies=[Depends(HTTPBearer())],
                        responses=PATCH_QUESTION_RESPONSES)
 async def patch_question(
@@ -222,11 +388,15 @@ async def patch_question(
                                          active=edited_question.active
                                          )
 
+        similar_questions = similarity_index.find_similar(question_title=question_update.question_title,
+                                                          choices=question_update.choices,
+                                                          exclude_id=question_id)
+
         await update_question_db(question_id=question_id, question_update=question_update, session=session)
 
         return {"status": "success",
                 "data": edited_question,
-                "details": None
+                "details": get_similar_details(similar_questions)
                 }
 
     except NumberOfChoicesNotFour:
@@ -257,17 +427,16 @@ async def patch_question(
 @question_router.post("/wrong_solved/ref", name="question: get reference", dependencies=[Depends(HTTPBearer())],
                       responses=SERVER_ERROR_AUTHORIZED_RESPONSE)
 async def get_wrong_solved(
+        request: Request,
         verified_user: CurrentUser,
-        list_question_id: list[int],
-        session: Session) -> dict:
+        session: Session,
+        list_question_id: list[int] = Body(max_length=BATCH_MAX_QUESTIONS),
+) -> Response:
     try:
 
         questions = await get_question_ref(list_questions=list_question_id, session=session)
 
-        return {"status": "success",
-                "data": questions,
-                "details": None
-                }
+        return success_response(request=request, data=question_cache.serialize(questions))
 
     except Exception:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=Exception)
@@ -308,6 +477,58 @@ async def make_question_inactive(
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=Exception)
 
 
+@question_router.post(
+    path="/bulk/activate",
+    name="question: make questions active",
+    dependencies=[Depends(HTTPBearer()), Depends(current_superuser)],
+    responses=BULK_ACTIVE_QUESTIONS_RESPONSES
+)
+async def make_questions_active(
+        session: Session,
+        questions_filter: QuestionsFilter,
+) -> dict:
+    """Activate all questions matching ids, section, author and date range, the given criteria are combined"""
+    try:
+        changed = await set_questions_active_db(questions_filter=questions_filter, active=True, session=session)
+
+        return {"status": "success",
+                "data": {"changed": changed},
+                "details": None
+                }
+
+    except EmptyQuestionsFilter:
+        raise QuestionErrors.empty_questions_filter_400
+
+    except Exception:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=Exception)
+
+
+@question_router.post(
+    path="/bulk/deactivate",
+    name="question: make questions inactive",
+    dependencies=[Depends(HTTPBearer()), Depends(current_superuser)],
+    responses=BULK_ACTIVE_QUESTIONS_RESPONSES
+)
+async def make_questions_inactive(
+        session: Session,
+        questions_filter: QuestionsFilter,
+) -> dict:
+    """Deactivate all questions matching ids, section, author and date range, the given criteria are combined"""
+    try:
+        changed = await set_questions_active_db(questions_filter=questions_filter, active=False, session=session)
+
+        return {"status": "success",
+                "data": {"changed": changed},
+                "details": None
+                }
+
+    except EmptyQuestionsFilter:
+        raise QuestionErrors.empty_questions_filter_400
+
+    except Exception:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=Exception)
+
+
 @question_router.delete(
     path="/delete",
     name="question: delete question",
@@ -320,17 +541,7 @@ async def delete_question(
 ) -> dict:
     try:
 
-        check_feedback = await check_feedback_question_id(question_id=question_id, session=session)
-
-        question_for_deleting = await get_question_id_db(question_id=question_id, session=session)
-
-        if not question_for_deleting:
-            raise QuestionNotFound
-
-        if check_feedback:
-            await delete_feedback_question_id(question_id=question_id, session=session)
-
-        await delete_question_db(question_id=question_id, session=session)
+        await delete_question_cascade(question_id=question_id, session=session)
 
         return {"status": "success",
                 "data": None,
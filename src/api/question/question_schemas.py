@@ -1,8 +1,8 @@
 from datetime import datetime
 from typing import Optional
 
-from pydantic import BaseModel
-from sqlalchemy import Column, Integer, String, TIMESTAMP, ForeignKey, JSON, Boolean
+from pydantic import BaseModel, Field
+from sqlalchemy import Column, Integer, String, TIMESTAMP, ForeignKey, JSON, Boolean, Index, Text
 
 from api.auth.auth_models import user
 from db.database import Base
@@ -37,8 +37,21 @@ class QuestionUpdate(BaseModel):
     active: bool
 
 
+class QuestionsFilter(BaseModel):
+    # Questions match if they satisfy all given criteria, at least one criterion is required
+    questions_ids: Optional[list[int]] = Field(default=None, max_length=1000)
+    section_id: Optional[int] = None
+    added_by: Optional[int] = None
+    added_from: Optional[datetime] = None
+    added_to: Optional[datetime] = None
+
+
 class Question(Base):
     __tablename__ = "question"
+    __table_args__ = (
+        Index("ix_question_section_id_active_id", "section_id", "active", "id"),
+        Index("ix_question_search_text", "search_text", mysql_prefix="FULLTEXT"),
+    )
     id = Column(Integer, primary_key=True)
     question_title = Column(String(length=200), nullable=False)
     choices = Column(JSON, nullable=False)
@@ -49,3 +62,6 @@ class Question(Base):
     added_at = Column(TIMESTAMP, default=datetime.utcnow)
     section_id = Column(Integer, ForeignKey("section.id"))
     active = Column(Boolean, default=False, nullable=False)
+    version = Column(Integer, default=1, server_default="1", nullable=False)
+    fingerprint = Column(String(length=64), nullable=True, unique=True)
+    search_text = Column(Text, nullable=True)
@@ -0,0 +1,215 @@
+import asyncio
+import math
+import re
+import time
+from collections import Counter, defaultdict
+from functools import partial
+from typing import Callable, NamedTuple
+
+from sqlalchemy import select, and_, or_
+from sqlalchemy.dialects.mysql import match
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.question.question_models import question
+from api.question.question_service import normalize_text
+
+_TOKEN = re.compile(r"\w+")
+
+
+class SearchResult(NamedTuple):
+    question_id: int
+    score: float
+
+
+def tokenize(text: str) -> list[str]:
+    return _TOKEN.findall(normalize_text(text))
+
+
+class SearchIndex:
+    def __init__(self, k1: float = 1.2, b: float = 0.75, refresh_interval: int = 300):
+        """
+        In-process inverted index ranked by BM25, it stands in for FULLTEXT index of MySQL on other databases
+        :param k1: how fast repeated term stops raising the score
+        :param b: how much long questions are penalized
+        :param refresh_interval: how much time(seconds) the index is trusted before it is rebuilt, other workers
+         change questions without notifying this one
+        """
+        self.k1 = k1
+        self.b = b
+        self.refresh_interval = refresh_interval
+        self.postings: defaultdict[str, dict[int, int]] = defaultdict(dict)
+        # Terms of every question, so its postings can be removed without reading it again
+        self.terms: dict[int, list[str]] = {}
+        self.lengths: dict[int, int] = {}
+        self.sections: dict[int, int] = {}
+        self.active: dict[int, bool] = {}
+        self.loaded_at: float | None = None
+        self._lock = asyncio.Lock()
+        # Writes of this worker made while the index is building, they are applied to the built index
+        self._changes: list[Callable[[], None]] | None = None
+
+    def _is_expired(self) -> bool:
+        return self.loaded_at is None or time.monotonic() - self.loaded_at > self.refresh_interval
+
+    def _add(self, question_id: int, search_text: str | None, section_id: int, active: bool) -> None:
+        tokens = Counter(tokenize(search_text or ""))
+
+        for token, frequency in tokens.items():
+            self.postings[token][question_id] = frequency
+
+        self.terms[question_id] = list(tokens)
+        self.lengths[question_id] = sum(tokens.values())
+        self.sections[question_id] = section_id
+        self.active[question_id] = active
+
+    def _remove(self, question_id: int) -> None:
+        for token in self.terms.pop(question_id, ()):
+            documents = self.postings[token]
+            documents.pop(question_id, None)
+
+            if not documents:
+                del self.postings[token]
+
+        self.lengths.pop(question_id, None)
+        self.sections.pop(question_id, None)
+        self.active.pop(question_id, None)
+
+    def _record(self, change: Callable[[], None]) -> None:
+        if self._changes is not None:
+            self._changes.append(change)
+
+    def upsert(self, question_id: int, search_text: str | None, active: bool, section_id: int = None) -> None:
+        """
+        Add question to the index or replace it. Nothing is changed until the index is built, it is built from db
+        then, on MySQL the index isn't built at all, FULLTEXT index is used instead
+        :param section_id: section of question, None keeps section of indexed question
+        """
+        self._record(partial(self.upsert, question_id=question_id, search_text=search_text, active=active,
+                             section_id=section_id))
+        section_id = self.sections.get(question_id) if section_id is None else section_id
+
+        if self.loaded_at is None or section_id is None:
+            return None
+
+        self._remove(question_id=question_id)
+        self._add(question_id=question_id, search_text=search_text, section_id=section_id, active=active)
+
+    def set_active(self, questions_ids: list[int], active: bool) -> None:
+        self._record(partial(self.set_active, questions_ids=questions_ids, active=active))
+
+        for question_id in questions_ids:
+            if question_id in self.active:
+                self.active[question_id] = active
+
+    def discard(self, questions_ids: list[int]) -> None:
+        self._record(partial(self.discard, questions_ids=questions_ids))
+
+        for question_id in questions_ids:
+            self._remove(question_id=question_id)
+
+    async def ensure_loaded(self, session: AsyncSession) -> None:
+        """Build the index if it wasn't built before or if it is expired"""
+        if not self._is_expired():
+            return None
+
+        async with self._lock:
+            # Another request could build the index while we were waiting for the lock
+            if not self._is_expired():
+                return None
+
+            built = SearchIndex(k1=self.k1, b=self.b)
+            self._changes = []
+
+            try:
+                query = select(question.c.id, question.c.search_text, question.c.section_id, question.c.active)
+                result_proxy = await session.stream(query.execution_options(yield_per=1000))
+
+                async for row in result_proxy:
+                    built._add(question_id=row.id, search_text=row.search_text, section_id=row.section_id,
+                               active=bool(row.active))
+
+            finally:
+                changes, self._changes = self._changes, None
+
+            self.postings, self.terms, self.lengths = built.postings, built.terms, built.lengths
+            self.sections, self.active = built.sections, built.active
+            self.loaded_at = time.monotonic()
+
+            # Questions written by this worker during building could be read before the write
+            for change in changes:
+                change()
+
+    def search(
+            self,
+            search_query: str,
+            limit: int,
+            section_id: int = None,
+            show_inactive: bool = False,
+            after: tuple[float, int] = None,
+    ) -> list[SearchResult]:
+        """Rank questions that have any query term, the best first and then by id"""
+        if not self.lengths:
+            return []
+
+        average_length = sum(self.lengths.values()) / len(self.lengths)
+        scores = defaultdict(float)
+
+        for token in set(tokenize(search_query)):
+            documents = self.postings.get(token)
+
+            if not documents:
+                continue
+
+            idf = math.log(1 + (len(self.lengths) - len(documents) + 0.5) / (len(documents) + 0.5))
+
+            for question_id, frequency in documents.items():
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[question_id] / average_length)
+                scores[question_id] += idf * frequency * (self.k1 + 1) / (frequency + norm)
+
+        results = [
+            SearchResult(question_id=question_id, score=score)
+            for question_id, score in scores.items()
+            if (section_id is None or self.sections[question_id] == section_id) and
+               (show_inactive or self.active[question_id]) and
+               (after is None or (-score, question_id) > (-after[0], after[1]))
+        ]
+        results.sort(key=lambda result: (-result.score, result.question_id))
+
+        return results[:limit]
+
+
+search_index = SearchIndex()
+
+
+async def search_questions_db(
+        search_query: str,
+        session: AsyncSession,
+        limit: int,
+        section_id: int = None,
+        show_inactive: bool = False,
+        after: tuple[float, int] = None,
+) -> list[SearchResult]:
+    """
+    Search questions by title, choices and reference, MySQL uses FULLTEXT index, other databases the in-process one
+    :param after: score and id of the last question of previous page
+    """
+    if session.bind.dialect.name != "mysql":
+        await search_index.ensure_loaded(session=session)
+        return search_index.search(search_query=search_query, limit=limit, section_id=section_id,
+                                   show_inactive=show_inactive, after=after)
+
+    score = match(question.c.search_text, against=search_query).in_natural_language_mode()
+    query = select(question.c.id, score.label("score")).where(score > 0)
+
+    if section_id is not None:
+        query = query.where(question.c.section_id == section_id)
+
+    if not show_inactive:
+        query = query.where(question.c.active == 1)
+
+    if after is not None:
+        query = query.where(or_(score < after[0], and_(score == after[0], question.c.id > after[1])))
+
+    result_proxy = await session.execute(query.order_by(score.desc(), question.c.id).limit(limit))
+
+    return [SearchResult(question_id=row.id, score=float(row.score)) for row in result_proxy]
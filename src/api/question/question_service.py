@@ -0,0 +1,37 @@
+import hashlib
+import unicodedata
+from typing import Iterable
+
+from api.question.question_schemas import QuestionRead
+from utilties.custom_exceptions import UserNotAdminSupervisor, NumberOfChoicesNotFour, AnswerNotIncluded
+
+
+def normalize_text(text: str) -> str:
+    """Unify unicode forms, letters case and whitespaces, so equal questions have equal text"""
+    return " ".join(unicodedata.normalize("NFKC", text).casefold().split())
+
+
+def get_question_fingerprint(question_title: str, choices: Iterable[str]) -> str:
+    """Hash of normalized title and sorted normalized choices, order of choices doesn't change it"""
+    normalized_choices = sorted({normalize_text(choice) for choice in choices} - {""})
+    canonical = "\x1e".join([normalize_text(question_title), "\x1f".join(normalized_choices)])
+
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def get_search_text(question_title: str, choices: Iterable[str], reference: str) -> str:
+    """Text that is indexed for full-text search of question"""
+    return normalize_text(" ".join([question_title, *choices, reference]))
+
+
+async def check_question_validity_user_grants(received_question: QuestionRead, role_id: int):
+    received_question.choices.discard('')  # removing empty string from set
+
+    if role_id == 1:  # user can't add questions
+        raise UserNotAdminSupervisor
+
+    if len(received_question.choices) != 4:  # checking if question have 4 choices
+        raise NumberOfChoicesNotFour
+
+    if received_question.answer not in received_question.choices:  # checking if answer included in choices
+        raise AnswerNotIncluded
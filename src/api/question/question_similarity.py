@@ -0,0 +1,290 @@
+"""
+Near-duplicate questions detection with MinHash signatures and LSH index
+
+Clusters of near-duplicates in the whole bank are found by offline job, run it from src directory:
+    python -m api.question.question_similarity --threshold 0.8
+"""
+import argparse
+import asyncio
+import json
+import logging
+import time
+from collections import defaultdict
+from typing import Iterable, NamedTuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.question.question_models import question
+from api.question.question_service import normalize_text
+from db.database import async_session_maker
+
+logger = logging.getLogger(__name__)
+
+# Shingles are hashed as polynomial of code points
+_SHINGLE_BASE = np.uint64(0x100000001B3)
+
+
+class SimilarQuestion(NamedTuple):
+    question_id: int
+    similarity: float
+
+
+def get_shingles(question_title: str, choices: Iterable[str], size: int = 4) -> np.ndarray:
+    """Hashes of unique characters n-grams of normalized title and sorted normalized choices"""
+    normalized_choices = sorted({normalize_text(choice) for choice in choices} - {""})
+    text = "\x1f".join([normalize_text(question_title), *normalized_choices])
+
+    code_points = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+
+    if code_points.size < size:
+        code_points = np.pad(code_points, (0, size - code_points.size))
+
+    shingles = np.zeros(code_points.size - size + 1, dtype=np.uint64)
+
+    for offset in range(size):
+        shingles = shingles * _SHINGLE_BASE + code_points[offset:offset + shingles.size]
+
+    return np.unique(shingles)
+
+
+class SimilarityIndex:
+    def __init__(
+            self,
+            permutations: int = 64,
+            bands: int = 16,
+            threshold: float = 0.8,
+            seed: int = 20240302,
+            refresh_interval: int = 300,
+    ):
+        """
+        In-memory LSH index of MinHash signatures of questions. Questions are candidates if their signatures are
+        equal in at least one band, then candidates are verified by estimated Jaccard similarity
+        :param permutations: length of signature, more permutations give more accurate similarity
+        :param bands: number of LSH bands, more bands find less similar candidates
+        :param threshold: the least Jaccard similarity of shingles to consider questions near-duplicates
+        :param seed: seed of hash functions, signatures are comparable only with the same seed
+        :param refresh_interval: how much time(seconds) the index is trusted before it is reloaded in background,
+         other workers change questions without notifying this one
+        """
+        if permutations % bands:
+            raise ValueError("permutations should be divisible by bands")
+
+        self.bands = bands
+        self.rows = permutations // bands
+        self.threshold = threshold
+        self.refresh_interval = refresh_interval
+
+        rng = np.random.default_rng(seed)
+        # Multiply-shift hashing, multipliers must be odd
+        self._multipliers = rng.integers(1, 2 ** 63, size=permutations, dtype=np.uint64)[:, None] | np.uint64(1)
+        self._increments = rng.integers(0, 2 ** 63, size=permutations, dtype=np.uint64)[:, None]
+
+        self.signatures: dict[int, np.ndarray] = {}
+        self.buckets: list[defaultdict[bytes, set[int]]] = [defaultdict(set) for _ in range(bands)]
+        self.loaded_at: float | None = None
+        self._load_task: asyncio.Task | None = None
+        # Signatures changed by this worker while the index is loading, None means discarded question
+        self._changes: dict[int, np.ndarray | None] | None = None
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.loaded_at is not None
+
+    def _is_expired(self) -> bool:
+        return not self.is_loaded or time.monotonic() - self.loaded_at > self.refresh_interval
+
+    def get_signature(self, question_title: str, choices: Iterable[str]) -> np.ndarray:
+        shingles = get_shingles(question_title=question_title, choices=choices)
+        hashes = (self._multipliers * shingles[None, :] + self._increments) >> np.uint64(32)
+
+        return hashes.min(axis=1).astype(np.uint32)
+
+    def _bands(self, signature: np.ndarray) -> list[bytes]:
+        return [signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
+
+    def _insert(
+            self,
+            signatures: dict[int, np.ndarray],
+            buckets: list[defaultdict[bytes, set[int]]],
+            question_id: int,
+            signature: np.ndarray,
+    ) -> None:
+        signatures[question_id] = signature
+
+        for band_buckets, key in zip(buckets, self._bands(signature)):
+            band_buckets[key].add(question_id)
+
+    def add(self, question_id: int, question_title: str, choices: Iterable[str]) -> None:
+        """Add question to the index or replace its signature"""
+        signature = self.get_signature(question_title=question_title, choices=choices)
+
+        self.discard(question_id=question_id)
+        self._insert(signatures=self.signatures, buckets=self.buckets, question_id=question_id, signature=signature)
+
+        if self._changes is not None:
+            self._changes[question_id] = signature
+
+    def discard(self, question_id: int) -> None:
+        if self._changes is not None:
+            self._changes[question_id] = None
+
+        signature = self.signatures.pop(question_id, None)
+
+        if signature is None:
+            return
+
+        for buckets, key in zip(self.buckets, self._bands(signature)):
+            buckets[key].discard(question_id)
+
+            if not buckets[key]:
+                del buckets[key]
+
+    def _candidates(self, signature: np.ndarray) -> set[int]:
+        candidates = set()
+
+        for buckets, key in zip(self.buckets, self._bands(signature)):
+            candidates |= buckets.get(key, set())
+
+        return candidates
+
+    def find_similar(
+            self,
+            question_title: str,
+            choices: Iterable[str],
+            exclude_id: int = None,
+    ) -> list[SimilarQuestion]:
+        """
+        Get near-duplicates of question, the most similar first
+        :param exclude_id: id of question itself if it is already in the bank
+        :returns: similar questions, empty list if the index isn't loaded yet
+        """
+        if self._is_expired():
+            self.start_loading()
+
+        # Expired index is still used while the fresh one is loading
+        if not self.is_loaded:
+            return []
+
+        signature = self.get_signature(question_title=question_title, choices=choices)
+        candidates = list(self._candidates(signature) - {exclude_id})
+
+        if not candidates:
+            return []
+
+        # Estimate similarity with all candidates in one pass
+        similarities = (np.stack([self.signatures[candidate_id] for candidate_id in candidates]) == signature). \
+            mean(axis=1)
+        order = np.argsort(-similarities, kind="stable")
+
+        return [SimilarQuestion(question_id=candidates[position], similarity=float(similarities[position]))
+                for position in order if similarities[position] >= self.threshold]
+
+    def clusters(self) -> list[list[int]]:
+        """Group all indexed questions into clusters of near-duplicates, questions without duplicates are skipped"""
+        parents = {}
+
+        def find(question_id: int) -> int:
+            parents.setdefault(question_id, question_id)
+
+            while parents[question_id] != question_id:
+                parents[question_id] = parents[parents[question_id]]
+                question_id = parents[question_id]
+
+            return question_id
+
+        for buckets in self.buckets:
+            for bucket in buckets.values():
+                if len(bucket) < 2:
+                    continue
+
+                members = sorted(bucket)
+                signatures = np.stack([self.signatures[question_id] for question_id in members])
+
+                for position, first_id in enumerate(members[:-1]):
+                    similarities = (signatures[position + 1:] == signatures[position]).mean(axis=1)
+
+                    for offset in np.flatnonzero(similarities >= self.threshold):
+                        parents[find(members[position + 1 + offset])] = find(first_id)
+
+        clusters = defaultdict(list)
+
+        for question_id in parents:
+            clusters[find(question_id)].append(question_id)
+
+        return sorted((sorted(cluster) for cluster in clusters.values() if len(cluster) > 1),
+                      key=lambda cluster: (-len(cluster), cluster[0]))
+
+    async def load(self, session: AsyncSession) -> None:
+        """Build the index from all questions, inactive ones can be activated again, so they are included"""
+        signatures = {}
+        buckets = [defaultdict(set) for _ in range(self.bands)]
+        self._changes = {}
+
+        try:
+            result_proxy = await session.stream(select(question.c.id, question.c.question_title, question.c.choices))
+
+            async for row in result_proxy:
+                self._insert(signatures=signatures, buckets=buckets, question_id=row.id,
+                             signature=self.get_signature(question_title=row.question_title, choices=row.choices))
+
+        finally:
+            changes, self._changes = self._changes, None
+
+        # Swap built index at once, so requests don't see partially loaded one
+        self.signatures = signatures
+        self.buckets = buckets
+        self.loaded_at = time.monotonic()
+
+        # Questions written by this worker during loading could be read before the write
+        for question_id, signature in changes.items():
+            self.discard(question_id=question_id)
+
+            if signature is not None:
+                self._insert(signatures=self.signatures, buckets=self.buckets, question_id=question_id,
+                             signature=signature)
+
+    async def _load_in_background(self) -> None:
+        try:
+            async with async_session_maker() as session:
+                await self.load(session=session)
+
+        except Exception:
+            logger.exception("Failed to load questions similarity index")
+
+        finally:
+            self._load_task = None
+
+    def start_loading(self) -> None:
+        """Load the index in background task, so the first request doesn't wait for the whole bank"""
+        if self._load_task is None:
+            self._load_task = asyncio.get_running_loop().create_task(self._load_in_background())
+
+
+similarity_index = SimilarityIndex()
+
+
+async def cluster_duplicates(threshold: float) -> list[list[int]]:
+    """Offline job that finds clusters of near-duplicates in the whole bank"""
+    index = SimilarityIndex(threshold=threshold)
+
+    async with async_session_maker() as session:
+        await index.load(session=session)
+
+    return index.clusters()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Find clusters of near-duplicate questions")
+    parser.add_argument("--threshold", type=float, default=0.8)
+    args = parser.parse_args()
+
+    clusters = asyncio.run(cluster_duplicates(threshold=args.threshold))
+
+    for cluster in clusters:
+        print(json.dumps(cluster))
+
+
+if __name__ == "__main__":
+    main()
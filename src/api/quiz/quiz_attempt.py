@@ -0,0 +1,94 @@
+import logging
+import secrets
+import struct
+from typing import NamedTuple
+
+import numpy as np
+from redis.exceptions import RedisError
+
+from db.redis_client import redis_client
+from utilties.custom_exceptions import QuizAttemptNotFound
+
+ATTEMPT_TTL = 3600 * 2  # TTL = 3600 seconds * 2 = two hours to submit the quiz
+
+# user_id of quiz taker, questions ids follow it as 4 bytes integers
+_OWNER = struct.Struct(">I")
+_QUESTION_ID = np.dtype(">u4")
+
+logger = logging.getLogger(__name__)
+
+
+class QuizAttempt(NamedTuple):
+    user_id: int
+    # Issued questions ids in quiz order
+    questions_ids: list[int]
+
+
+def _attempt_key(attempt_id: str) -> str:
+    return f"quiz_attempt:{attempt_id}"
+
+
+async def register_attempt(user_id: int, questions_ids: list[int]) -> str | None:
+    """
+    Save ids of issued quiz in redis and return attempt_id, 50 questions take about 200 bytes. Ids are stored instead
+    of rebuilding the quiz on submit, so question bank can change in the meantime on any worker
+    :returns: attempt_id or None if redis is unavailable, the quiz can't be submitted then
+    """
+    attempt_id = secrets.token_urlsafe(12)
+    value = _OWNER.pack(user_id) + np.asarray(questions_ids, dtype=_QUESTION_ID).tobytes()
+
+    try:
+        await redis_client.set(_attempt_key(attempt_id), value, ex=ATTEMPT_TTL)
+
+    except RedisError:
+        logger.warning("Redis is unavailable, quiz attempt wasn't registered")
+        return None
+
+    return attempt_id
+
+
+async def get_attempt(attempt_id: str, user_id: int) -> QuizAttempt:
+    """
+    Get attempt without removing it, it is removed by delete_attempt only when the quiz is graded
+    :raises QuizAttemptNotFound: if attempt is expired, already submitted or belongs to another user
+    """
+    value = await redis_client.get(_attempt_key(attempt_id))
+
+    if value is None:
+        raise QuizAttemptNotFound
+
+    (owner_id,) = _OWNER.unpack_from(value)
+
+    # Raise exception if attempt belongs to another user
+    if owner_id != user_id:
+        raise QuizAttemptNotFound
+
+    questions_ids = np.frombuffer(value, dtype=_QUESTION_ID, offset=_OWNER.size).tolist()
+
+    return QuizAttempt(user_id=user_id, questions_ids=questions_ids)
+
+
+async def delete_attempt(attempt_id: str) -> bool:
+    """Remove graded attempt, only one of concurrent submits of the same attempt gets True"""
+    return bool(await redis_client.delete(_attempt_key(attempt_id)))
+
+
+async def restore_attempt(attempt_id: str, attempt: QuizAttempt) -> None:
+    """Save deleted attempt again when its result couldn't be saved, so the quiz can be submitted again"""
+    value = _OWNER.pack(attempt.user_id) + np.asarray(attempt.questions_ids, dtype=_QUESTION_ID).tobytes()
+    await redis_client.set(_attempt_key(attempt_id), value, ex=ATTEMPT_TTL, nx=True)
+
+
+def grade(answers: list[str | None], questions: list[dict]) -> np.ndarray:
+    """
+    Compare submitted answers with answers of questions in one vectorized pass
+    :param answers: answers in quiz order, missing answers are considered wrong
+    :param questions: questions payloads in quiz order
+    :returns: boolean array, True for every correct answer
+    """
+    submitted = np.full(len(questions), None, dtype=object)
+    submitted[:min(len(answers), len(questions))] = answers[:len(questions)]
+
+    expected = np.array([row["answer"] for row in questions], dtype=object)
+
+    return submitted == expected
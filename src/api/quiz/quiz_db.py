@@ -1,41 +1,109 @@
-import itertools
+from enum import Enum
+from typing import NamedTuple
 
-from sqlalchemy import select, func
+import numpy as np
+from sqlalchemy import select, func, case
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from api.question.question_cache import question_cache
 from api.question.question_models import question
-from utilties.result_into_list import ResultIntoList
+from api.quiz.quiz_index import question_index
+from api.quiz.quiz_seen import SeenFilter
+from config import QUIZ_STRATEGY
 
 
-async def get_quiz_db(
-        number_ai_questions: int,
-        number_network_questions: int,
-        number_software_questions: int,
+class QuizStrategy(str, Enum):
+    INDEX = "index"
+    WINDOW = "window"
+
+
+def get_quiz_strategy() -> QuizStrategy:
+    """Strategy of live quiz generation configured for the app"""
+    return QuizStrategy(QUIZ_STRATEGY)
+
+
+class Quiz(NamedTuple):
+    questions: list[dict]
+    # Questions are already in random order
+    shuffled: bool = False
+
+
+async def _get_quiz_index_db(
+        counts: dict[int, int],
         session: AsyncSession,
         user_id: int = None,
-):
-    """Get quiz and validate that quiz don't have questions that quiz taker write"""
+        seen: SeenFilter = None,
+) -> Quiz:
+    """Choose questions ids in memory instead of sorting the whole table randomly, then fetch them at once"""
+    await question_index.ensure_loaded(session=session)
+
+    questions_ids = question_index.sample(counts=counts, user_id=user_id, seen=seen).tolist()
+
+    questions = await question_cache.fetch_many(questions_ids=questions_ids, session=session,
+                                                versions=question_index.get_versions(questions_ids))
+
+    # Skip questions that were deleted after the index was loaded
+    return Quiz(questions=[payload for payload in questions if payload is not None], shuffled=True)
+
+
+async def _get_quiz_window_db(counts: dict[int, int], session: AsyncSession, user_id: int = None) -> Quiz:
+    """Get random questions of all sections in one statement ranking questions randomly inside every section"""
+    counts = {section_id: number_questions for section_id, number_questions in counts.items() if number_questions}
 
-    software_query = select(question).\
-        filter(question.c.added_by != user_id, question.c.section_id == 1, question.c.active == 1).\
-        order_by(func.random()).limit(number_software_questions)
+    if not counts:
+        return Quiz(questions=[])
 
-    network_query = select(question).\
-        filter(question.c.added_by != user_id, question.c.section_id == 2, question.c.active == 1).\
-        order_by(func.random()).limit(number_network_questions)
+    ranked_questions = select(
+        question.c.id,
+        question.c.section_id,
+        question.c.version,
+        func.row_number().over(partition_by=question.c.section_id, order_by=func.random()).label("section_rank")
+    ).filter(question.c.added_by != user_id, question.c.section_id.in_(counts), question.c.active == 1).subquery()
 
-    ai_query = select(question).\
-        filter(question.c.added_by != user_id, question.c.section_id == 3, question.c.active == 1).\
-        order_by(func.random()).limit(number_ai_questions)
+    # Take first questions of every section as many as the section needs
+    quiz_query = select(ranked_questions.c.id, ranked_questions.c.version).where(
+        ranked_questions.c.section_rank <= case(counts, value=ranked_questions.c.section_id, else_=0)
+    )
+    result_proxy = await session.execute(quiz_query)
+    rows = result_proxy.all()
 
-    software = await session.execute(software_query)
-    network = await session.execute(network_query)
-    ai = await session.execute(ai_query)
+    questions = await question_cache.fetch_many(questions_ids=[row.id for row in rows], session=session,
+                                                versions=[row.version for row in rows])
 
-    software = ResultIntoList(result_proxy=software)
-    network = ResultIntoList(result_proxy=network)
-    ai = ResultIntoList(result_proxy=ai)
+    return Quiz(questions=[payload for payload in questions if payload is not None])
+
+
+def get_sections_counts(number_questions: int, weights: dict[int, float]) -> dict[int, int]:
+    """Split number of questions between sections proportionally to their weights"""
+    if not weights:
+        return {}
+
+    sections_ids = sorted(weights)
+    shares = np.array([weights[section_id] for section_id in sections_ids], dtype=np.float64)
+    shares = shares / shares.sum() * number_questions
+
+    counts = np.floor(shares).astype(np.int64)
+
+    # Give remaining questions to sections with the largest fractional parts
+    remaining = number_questions - int(counts.sum())
+    counts[np.argsort(counts - shares, kind="stable")[:remaining]] += 1
+
+    return {section_id: int(number) for section_id, number in zip(sections_ids, counts)}
+
+
+async def get_quiz_db(
+        counts: dict[int, int],
+        session: AsyncSession,
+        user_id: int = None,
+        strategy: QuizStrategy = QuizStrategy.INDEX,
+        seen: SeenFilter = None,
+) -> Quiz:
+    """
+    Get quiz and validate that quiz don't have questions that quiz taker write
+    :param seen: filter of questions that quiz taker has seen recently, it is used only by index strategy
+    """
 
-    result = list(itertools.chain(software.parse(), network.parse(), ai.parse()))
+    if strategy == QuizStrategy.WINDOW:
+        return await _get_quiz_window_db(counts=counts, session=session, user_id=user_id)
 
-    return result
+    return await _get_quiz_index_db(counts=counts, session=session, user_id=user_id, seen=seen)
@@ -34,4 +34,21 @@ GET_QUIZ_RESPONSES: OpenAPIResponseType = {
     },
 }
 
+SUBMIT_QUIZ_RESPONSES: OpenAPIResponseType = {
+    status.HTTP_404_NOT_FOUND: {
+        "model": ErrorModel,
+        "content": {
+            "application/json": {
+                "examples": {
+                    ErrorCode.QUIZ_ATTEMPT_NOT_FOUND: {
+                        "summary": "Quiz attempt not exists or already submitted",
+                        "value": {"detail": ErrorCode.QUIZ_ATTEMPT_NOT_FOUND},
+                    }
+                }
+            },
+        },
+    },
+}
+
 GET_QUIZ_RESPONSES.update(SERVER_ERROR_AUTHORIZED_RESPONSE)
+SUBMIT_QUIZ_RESPONSES.update(SERVER_ERROR_AUTHORIZED_RESPONSE)
@@ -15,3 +15,8 @@ class Errors(NamedTuple):
         status_code=status.HTTP_400_BAD_REQUEST,
         detail=ErrorCode.EMPTY_LIST
     )
+
+    quiz_attempt_not_found_404 = HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=ErrorCode.QUIZ_ATTEMPT_NOT_FOUND
+    )
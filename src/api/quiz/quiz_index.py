@@ -0,0 +1,197 @@
+import asyncio
+import time
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.question.question_models import question
+from api.quiz.quiz_seen import SeenFilter
+
+
+class QuestionIndex:
+    def __init__(self, refresh_interval: int = 300):
+        """
+        Columnar index of active questions kept in memory of every worker, so quiz sampling doesn't sort the
+        question table on every request
+        :param refresh_interval: how much time(seconds) the index is trusted before it is fully reloaded, other
+         workers change questions without notifying this one
+        """
+        self.refresh_interval = refresh_interval
+        self.ids: np.ndarray = np.empty(0, dtype=np.int64)
+        self.section_ids: np.ndarray = np.empty(0, dtype=np.int64)
+        self.added_by: np.ndarray = np.empty(0, dtype=np.int64)
+        # Versions of questions payloads
+        self.versions: np.ndarray = np.empty(0, dtype=np.int64)
+        self.loaded_at: float | None = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.loaded_at is not None
+
+    def _is_expired(self) -> bool:
+        return not self.is_loaded or time.monotonic() - self.loaded_at > self.refresh_interval
+
+    def clear(self) -> None:
+        """Forget loaded questions, the index is loaded again with the next quiz"""
+        self.ids = np.empty(0, dtype=np.int64)
+        self.section_ids = np.empty(0, dtype=np.int64)
+        self.added_by = np.empty(0, dtype=np.int64)
+        self.versions = np.empty(0, dtype=np.int64)
+        self.loaded_at = None
+
+    async def load(self, session: AsyncSession) -> None:
+        """Load ids, section_id, added_by and version of all active questions ordered by id"""
+        query = select(question.c.id, question.c.section_id, question.c.added_by, question.c.version). \
+            where(question.c.active == 1).order_by(question.c.id)
+        result_proxy = await session.execute(query)
+
+        columns = np.array(result_proxy.all(), dtype=np.int64).reshape(-1, 4)
+
+        self.ids = columns[:, 0].copy()
+        self.section_ids = columns[:, 1].copy()
+        self.added_by = columns[:, 2].copy()
+        self.versions = columns[:, 3].copy()
+        self.loaded_at = time.monotonic()
+
+    async def ensure_loaded(self, session: AsyncSession) -> None:
+        """Load the index if it wasn't loaded before or if it is expired"""
+        if not self._is_expired():
+            return None
+
+        async with self._lock:
+            # Another request could load the index while we were waiting for the lock
+            if self._is_expired():
+                await self.load(session=session)
+
+    def upsert(self, question_id: int, section_id: int, added_by: int, version: int = 1) -> None:
+        """Add active question to the index or update it if exists"""
+        position = int(np.searchsorted(self.ids, question_id))
+
+        if position < self.ids.size and self.ids[position] == question_id:
+            self.section_ids[position] = section_id
+            self.added_by[position] = added_by
+            self.versions[position] = version
+
+        else:
+            self.ids = np.insert(self.ids, position, question_id)
+            self.section_ids = np.insert(self.section_ids, position, section_id)
+            self.added_by = np.insert(self.added_by, position, added_by)
+            self.versions = np.insert(self.versions, position, version)
+
+    def upsert_many(
+            self,
+            questions_ids: list[int],
+            section_ids: list[int],
+            added_by: list[int],
+            versions: list[int],
+    ) -> None:
+        """Add active questions to the index or update the ones that exist, columns are rebuilt once"""
+        keep = ~np.isin(self.ids, np.asarray(questions_ids, dtype=np.int64))
+        ids = np.concatenate([self.ids[keep], np.asarray(questions_ids, dtype=np.int64)])
+        order = np.argsort(ids, kind="stable")
+
+        self.ids = ids[order]
+        self.section_ids = np.concatenate([self.section_ids[keep], np.asarray(section_ids, dtype=np.int64)])[order]
+        self.added_by = np.concatenate([self.added_by[keep], np.asarray(added_by, dtype=np.int64)])[order]
+        self.versions = np.concatenate([self.versions[keep], np.asarray(versions, dtype=np.int64)])[order]
+
+    def discard(self, question_id: int) -> None:
+        """Remove question from the index if exists"""
+        position = int(np.searchsorted(self.ids, question_id))
+
+        if position < self.ids.size and self.ids[position] == question_id:
+            self.ids = np.delete(self.ids, position)
+            self.section_ids = np.delete(self.section_ids, position)
+            self.added_by = np.delete(self.added_by, position)
+            self.versions = np.delete(self.versions, position)
+
+    def discard_many(self, questions_ids: list[int]) -> None:
+        """Remove questions from the index, ids that aren't in the index are ignored"""
+        keep = ~np.isin(self.ids, np.asarray(questions_ids, dtype=np.int64))
+
+        self.ids = self.ids[keep]
+        self.section_ids = self.section_ids[keep]
+        self.added_by = self.added_by[keep]
+        self.versions = self.versions[keep]
+
+    async def refresh_question(self, question_id: int, session: AsyncSession) -> None:
+        """Synchronize one question with the database after it was inserted or updated"""
+        if not self.is_loaded:
+            # The whole index will be loaded with the next quiz
+            return None
+
+        query = select(question.c.section_id, question.c.added_by, question.c.active, question.c.version). \
+            where(question.c.id == question_id)
+        result_proxy = await session.execute(query)
+        row = result_proxy.one_or_none()
+
+        if row is not None and row.active:
+            self.upsert(question_id=question_id, section_id=row.section_id, added_by=row.added_by,
+                        version=row.version)
+        else:
+            self.discard(question_id=question_id)
+
+    def get_versions(self, questions_ids: list[int]) -> list[int | None]:
+        """Get payload versions of questions, None for questions that aren't in the index"""
+        ids = np.asarray(questions_ids, dtype=np.int64)
+        positions = np.minimum(np.searchsorted(self.ids, ids), max(self.ids.size - 1, 0))
+
+        if not self.ids.size:
+            return [None] * ids.size
+
+        found = self.ids[positions] == ids
+
+        return [int(version) if is_found else None for version, is_found in zip(self.versions[positions], found)]
+
+    def sample(
+            self,
+            counts: dict[int, int],
+            user_id: int = None,
+            seed: int = None,
+            seen: SeenFilter = None,
+    ) -> np.ndarray:
+        """
+        Choose random questions ids for every section without repeating, the same seed always gives the same
+        quiz from the same questions
+        :param counts: how many questions should be chosen for every section_id
+        :param user_id: questions added by this user are excluded
+        :param seed: seed of random generator, random quiz is chosen if it is None
+        :param seen: questions that user has seen recently are chosen only if section hasn't enough other ones
+        :returns: array of chosen questions ids in quiz order
+        """
+        ids, section_ids, added_by = self.ids, self.section_ids, self.added_by
+
+        rng = np.random.default_rng(seed)
+
+        sections = np.array(sorted(counts), dtype=np.int64)
+        quotas = np.array([counts[section_id] for section_id in sections], dtype=np.int64)
+
+        allowed = np.isin(section_ids, sections)
+        if user_id is not None:
+            allowed &= added_by != user_id
+
+        candidates = ids[allowed]
+        candidates_sections = np.searchsorted(sections, section_ids[allowed])
+
+        # Random key inside every section, seen questions get keys after all unseen ones
+        keys = rng.random(candidates.size)
+        if seen is not None:
+            keys = (keys + seen.contains(candidates)) / 2
+
+        # Shuffle candidates inside every section in one sort, its cost doesn't depend on number of sections
+        order = np.argsort(candidates_sections + keys)
+        candidates = candidates[order]
+        candidates_sections = candidates_sections[order]
+
+        # Position of every candidate inside its section
+        sections_starts = np.searchsorted(candidates_sections, np.arange(sections.size))
+        ranks = np.arange(candidates.size) - sections_starts[candidates_sections]
+
+        chosen = candidates[ranks < quotas[candidates_sections]]
+
+        return rng.permutation(chosen)
+
+
+question_index = QuestionIndex()
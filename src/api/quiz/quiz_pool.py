@@ -0,0 +1,161 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import NamedTuple
+
+import numpy as np
+from numpy import random as num_random
+
+from api.quiz.quiz_db import get_quiz_db, get_sections_counts, Quiz
+from api.quiz.quiz_seen import SeenFilter
+from api.section.section_service import section_weights
+from config import QUIZ_POOL_MAX_SEEN_SHARE
+from core.unit_of_work import UnitOfWork
+from db.database import async_session_maker
+
+logger = logging.getLogger(__name__)
+
+
+class PooledQuiz(NamedTuple):
+    quiz: Quiz
+    authors: frozenset[int]
+    questions_ids: np.ndarray
+
+
+class QuizPool:
+    def __init__(
+            self,
+            depth: int = 5,
+            refill_interval: float = 1.0,
+            min_questions: int = 20,
+            max_questions: int = 50,
+            max_seen_share: float = 0.1,
+    ):
+        """
+        Bounded pools of ready-made quizzes for every number of questions and exclusion class, so spikes of
+        quiz requests don't hit the database
+        :param depth: how many ready-made quizzes are kept for every pool
+        :param refill_interval: how much time(seconds) the background task rests between refills
+        :param min_questions: the smallest number of questions that quiz can have
+        :param max_questions: the biggest number of questions that quiz can have
+        :param max_seen_share: the biggest share of questions that quiz taker has seen recently, quiz with more of
+         them is left for other users
+        """
+        self.depth = depth
+        self.refill_interval = refill_interval
+        self.max_seen_share = max_seen_share
+
+        # Supervisors and admins mustn't get their own questions, so they have separate pools
+        self.pools: dict[tuple[int, bool], deque[PooledQuiz]] = {
+            (number_questions, exclude_author): deque(maxlen=depth)
+            for number_questions in range(min_questions, max_questions + 1)
+            for exclude_author in (False, True)
+        }
+
+        self.hits = 0
+        self.misses = 0
+        self.last_refill_at: float | None = None
+        self.last_refill_duration: float | None = None
+        self._task: asyncio.Task | None = None
+
+    def pop(self, number_questions: int, user_id: int = None, seen: SeenFilter = None) -> Quiz | None:
+        """
+        Take ready-made quiz from the pool
+        :param number_questions: how many questions quiz should have
+        :param user_id: author whose questions mustn't be included in quiz, None for students
+        :param seen: filter of questions that quiz taker has seen recently
+        :returns: shuffled quiz or None if pool is empty and quiz should be generated live
+        """
+        pool = self.pools.get((number_questions, user_id is not None))
+
+        # Take the first quiz that suits the user, others are left for other users
+        for position, quiz in enumerate(pool or ()):
+            if user_id is not None and user_id in quiz.authors:
+                continue
+
+            if seen is not None and seen.contains(quiz.questions_ids).mean() > self.max_seen_share:
+                continue
+
+            del pool[position]
+            self.hits += 1
+            return quiz.quiz
+
+        self.misses += 1
+        return None
+
+    async def refill(self) -> None:
+        """Generate quizzes for every pool that isn't full"""
+        started_at = time.monotonic()
+        weights = await section_weights.get(uow=UnitOfWork())
+
+        async with async_session_maker() as session:
+            for (number_questions, _), pool in self.pools.items():
+                while len(pool) < self.depth:
+                    counts = get_sections_counts(number_questions=number_questions, weights=weights)
+                    quiz = await get_quiz_db(counts=counts, session=session)
+
+                    if not quiz.questions:
+                        break
+
+                    if not quiz.shuffled:
+                        num_random.shuffle(quiz.questions)
+
+                    pool.append(PooledQuiz(
+                        quiz=quiz,
+                        authors=frozenset(row["added_by"] for row in quiz.questions),
+                        questions_ids=np.array([row["id"] for row in quiz.questions], dtype=np.int64)
+                    ))
+
+        self.last_refill_at = time.monotonic()
+        self.last_refill_duration = self.last_refill_at - started_at
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refill()
+
+            except asyncio.CancelledError:
+                raise
+
+            except Exception:
+                logger.exception("Refilling quiz pool failed")
+
+            await asyncio.sleep(self.refill_interval)
+
+    def start(self) -> None:
+        """Start background task that keeps pools full"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Cancel background task"""
+        if self._task is not None:
+            self._task.cancel()
+
+            try:
+                await self._task
+
+            except asyncio.CancelledError:
+                pass
+
+            self._task = None
+
+    def metrics(self) -> dict:
+        """Depth of every pool, hit rate and how long ago pools were refilled"""
+        requests_number = self.hits + self.misses
+
+        return {
+            "depth": {
+                f"{number_questions}:{'supervisor' if exclude_author else 'student'}": len(pool)
+                for (number_questions, exclude_author), pool in self.pools.items()
+            },
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / requests_number if requests_number else None,
+            "refill_lag": time.monotonic() - self.last_refill_at if self.last_refill_at is not None else None,
+            "last_refill_duration": self.last_refill_duration,
+        }
+
+
+quiz_pool = QuizPool(max_seen_share=QUIZ_POOL_MAX_SEEN_SHARE)
@@ -5,11 +5,33 @@ from starlette import status
 from starlette.requests import Request
 from starlette.responses import Response
 
-from api.quiz.quiz_db import get_quiz_db
-from api.quiz.quiz_docs import GET_QUIZ_RESPONSES
+from api.auth.base_config import current_superuser
+from api.question.question_cache import question_cache
+from api.quiz.quiz_attempt import register_attempt, get_attempt, delete_attempt, restore_attempt, grade
+from api.quiz.quiz_db import get_quiz_db, get_sections_counts
+from api.quiz.quiz_docs import GET_QUIZ_RESPONSES, SUBMIT_QUIZ_RESPONSES
 from api.quiz.quiz_errors import Errors
-from core.dependecies import CurrentUser, Session
-from utilties.custom_exceptions import QuestionsInvalidNumber, EmptyList
+from api.quiz.quiz_index import question_index
+from api.quiz.quiz_pool import quiz_pool
+from api.quiz.quiz_schemas import QuizSubmit
+from api.quiz.quiz_seen import seen_store
+from api.rating.rating_docs import SERVER_ERROR_AUTHORIZED_RESPONSE
+from api.rating.rating_schemas import RatingRead
+from api.rating.rating_service import add_rating_service
+from api.section.section_service import section_weights
+from core.dependecies import CurrentUser, Session, UOWDep, QuizStrategyDep
+from utilties.custom_exceptions import (
+    QuestionsInvalidNumber,
+    EmptyList,
+    QuizAttemptNotFound,
+    WarnsUserException,
+    RaisingBlockingLevel,
+    AddedToBlacklist,
+    BlockedReturnAfter,
+    HighestBlockingLevel
+)
+from utilties.error_code import ErrorCode
+from utilties.fast_response import success_response
 
 quiz_router = APIRouter(
     prefix="/quiz",
@@ -27,44 +49,53 @@ async def get_quiz(
         response: Response,
         verified_user: CurrentUser,
         session: Session,
+        uow: UOWDep,
+        strategy: QuizStrategyDep,
         number_questions: int = Query(default=50, lt=51, gt=19),
-) -> dict:
+) -> Response:
     try:
         # Check if number of questions requested is valid
         if number_questions not in range(20, 51):
             raise QuestionsInvalidNumber
 
-        # Get questions from db
-        number_software_questions = int(number_questions * 0.6)
-        number_network_questions = int(number_questions * 0.2)
-        number_ai_questions = int(number_questions * 0.2)
-
-        if verified_user.role_id != 1:
-            # Check if user id admin_panel or supervisor to validate that we don't give them their questions in quiz
-            result = await get_quiz_db(number_ai_questions=number_ai_questions,
-                                       number_network_questions=number_network_questions,
-                                       number_software_questions=number_software_questions,
-                                       user_id=verified_user.id,
-                                       session=session)
-
-        else:
-            # Get quiz for user(student)
-            result = await get_quiz_db(number_ai_questions=number_ai_questions,
-                                       number_network_questions=number_network_questions,
-                                       number_software_questions=number_software_questions,
-                                       session=session)
-
-        # Raise exception if list is empty
-        if not result:
-            raise EmptyList
-
-        # Shuffle the list before return it
-        num_random.shuffle(result)
+        # Check if user id admin_panel or supervisor to validate that we don't give them their questions in quiz
+        excluded_user_id = verified_user.id if verified_user.role_id != 1 else None
 
-        return {"status": "success",
-                "data": result,
-                "details": None
-                }
+        # Get questions that user has seen recently to avoid repeating them
+        seen_generation, seen = await seen_store.load(user_id=verified_user.id)
+
+        # Take ready-made quiz, it is already shuffled
+        quiz = quiz_pool.pop(number_questions=number_questions, user_id=excluded_user_id, seen=seen)
+
+        if quiz is None:
+            # Get questions from db if there is no ready-made quiz
+            weights = await section_weights.get(uow=uow)
+            quiz = await get_quiz_db(counts=get_sections_counts(number_questions=number_questions, weights=weights),
+                                     user_id=excluded_user_id,
+                                     session=session,
+                                     strategy=strategy,
+                                     seen=seen)
+
+            # Raise exception if list is empty
+            if not quiz.questions:
+                raise EmptyList
+
+            # Shuffle the list before return it if it isn't shuffled by sampling
+            if not quiz.shuffled:
+                num_random.shuffle(quiz.questions)
+
+        if seen is not None:
+            await seen_store.remember(user_id=verified_user.id, generation=seen_generation, seen_filter=seen,
+                                      questions_ids=[row["id"] for row in quiz.questions])
+
+        # Register attempt to grade it on submit, ids of issued questions are kept with it
+        attempt_id = await register_attempt(user_id=verified_user.id,
+                                            questions_ids=[row["id"] for row in quiz.questions])
+
+        details = {"attempt_id": attempt_id}
+
+        # Questions are spliced as pre-serialized fragments instead of encoding the whole quiz again
+        return success_response(request=request, data=question_cache.serialize(quiz.questions), details=details)
 
     except EmptyList:
         raise Errors.empty_list_returned_404
@@ -74,3 +105,105 @@ async def get_quiz(
 
     except Exception:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=Exception)
+
+
+@quiz_router.post(
+    path="/submit",
+    name="quiz:submit quiz",
+    dependencies=[Depends(HTTPBearer())], responses=SUBMIT_QUIZ_RESPONSES
+)
+async def submit_quiz(
+        quiz_submit: QuizSubmit,
+        verified_user: CurrentUser,
+        session: Session,
+) -> dict:
+    """
+    Grade submitted answers, add result to student's rating and return references of wrong answers. If the result
+    warns or blocks the student, it is returned too, details.rating has the warning or blocking
+    """
+    try:
+        attempt = await get_attempt(attempt_id=quiz_submit.attempt_id, user_id=verified_user.id)
+
+        questions_ids = attempt.questions_ids
+        payloads = await question_cache.fetch_many(questions_ids=questions_ids, session=session,
+                                                   versions=question_index.get_versions(questions_ids))
+
+        # Pair every answer with its question first, then skip questions deleted after quiz was issued with their
+        # answers, so answers after deleted question are still compared with their own questions
+        answers = (quiz_submit.answers + [None] * len(questions_ids))[:len(questions_ids)]
+        graded = [(payload, answer) for payload, answer in zip(payloads, answers) if payload is not None]
+
+        questions = [payload for payload, _ in graded]
+        correct = grade(answers=[answer for _, answer in graded], questions=questions)
+
+        questions_number = len(questions)
+        solved = int(correct.sum())
+        wrong = [
+            {"id": row["id"],
+             "answer": row["answer"],
+             "reference": row["reference"],
+             "reference_link": row["reference_link"]}
+            for row, is_correct in zip(questions, correct) if not is_correct
+        ]
+
+        # Attempt is removed only after the result is built, and only one of concurrent submits counts it
+        if not await delete_attempt(attempt_id=quiz_submit.attempt_id):
+            raise QuizAttemptNotFound
+
+        # Warning or blocking caused by the result, the result is returned anyway
+        rating_detail = None
+
+        # Only students' results in quizzes with enough questions are counted in rating
+        if verified_user.role_id == 1 and questions_number in range(30, 51):
+            try:
+                await add_rating_service(
+                    rating_read=RatingRead(questions_number=questions_number, solved=solved),
+                    user=verified_user,
+                    session=session
+                )
+
+            # Warnings and blocking are results of the quiz, submitting it again would apply them twice
+            except WarnsUserException:
+                rating_detail = ErrorCode.WARNING_USER
+
+            except (RaisingBlockingLevel, AddedToBlacklist):
+                rating_detail = ErrorCode.TEMPORARY_BLOCKED
+
+            except BlockedReturnAfter as e:
+                rating_detail = f"You are blocked now, please return after {e.args[0]} days"
+
+            except HighestBlockingLevel:
+                rating_detail = ErrorCode.PERMANENTLY_BLOCKED
+
+            except Exception:
+                await restore_attempt(attempt_id=quiz_submit.attempt_id, attempt=attempt)
+                raise
+
+        return {"status": "success",
+                "data": {"questions_number": questions_number, "solved": solved, "wrong": wrong},
+                "details": {"rating": rating_detail}
+                }
+
+    except QuizAttemptNotFound:
+        raise Errors.quiz_attempt_not_found_404
+
+    except Exception:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=Exception)
+
+
+@quiz_router.get(
+    path="/metrics",
+    name="quiz:get quiz pool metrics",
+    dependencies=[Depends(HTTPBearer()), Depends(current_superuser)],
+    responses=SERVER_ERROR_AUTHORIZED_RESPONSE
+)
+async def get_quiz_pool_metrics() -> dict:
+    """Get depth, hit rate and refill lag of ready-made quizzes pools"""
+    try:
+        return {"status": "success",
+                "data": quiz_pool.metrics(),
+                "details": None
+                }
+
+    except Exception:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=Exception)
@@ -0,0 +1,9 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class QuizSubmit(BaseModel):
+    attempt_id: str
+    # Answers in the same order of quiz questions, None for skipped question
+    answers: list[Optional[str]]
@@ -0,0 +1,162 @@
+import logging
+import struct
+
+import numpy as np
+from redis.exceptions import RedisError
+
+from config import QUIZ_SEEN_TTL, QUIZ_SEEN_BITS, QUIZ_SEEN_WINDOW
+from db.redis_client import redis_client
+
+# count of ids added to current filter
+_HEADER = struct.Struct(">I")
+
+_GOLDEN_RATIO = np.uint64(0x9E3779B97F4A7C15)
+_MIX = np.uint64(0xBF58476D1CE4E5B9)
+
+logger = logging.getLogger(__name__)
+
+
+class SeenFilter:
+    def __init__(
+            self,
+            bits: int = 8192,
+            hashes: int = 4,
+            capacity: int = 400,
+            current: np.ndarray = None,
+            previous: np.ndarray = None,
+            count: int = 0,
+    ):
+        """
+        Pair of Bloom filters of questions ids that user has seen recently, when current filter is full it becomes
+        previous one, so the filter remembers between capacity and capacity * 2 last questions
+        :param bits: size of every Bloom filter, should be power of two
+        :param hashes: how many bits are set for every question id
+        :param capacity: how many questions ids are added to current filter before rotating
+        """
+        if bits & (bits - 1):
+            raise ValueError("bits should be power of two")
+
+        self.bits = bits
+        self.hashes = hashes
+        self.capacity = capacity
+        self.current = current if current is not None else np.zeros(bits, dtype=bool)
+        self.previous = previous if previous is not None else np.zeros(bits, dtype=bool)
+        self.count = count
+        self._shift = np.uint64(64 - (bits.bit_length() - 1))
+
+    def _positions(self, questions_ids: np.ndarray) -> np.ndarray:
+        """Bits positions of every id using double hashing, shape is (hashes, len(questions_ids))"""
+        ids = np.asarray(questions_ids, dtype=np.uint64)
+
+        first = ids * _GOLDEN_RATIO
+        second = ((ids ^ (ids >> np.uint64(31))) * _MIX) | np.uint64(1)
+        steps = np.arange(self.hashes, dtype=np.uint64)[:, None]
+
+        return ((first + steps * second) >> self._shift).astype(np.int64)
+
+    def contains(self, questions_ids: np.ndarray) -> np.ndarray:
+        """Boolean mask of ids that were probably seen"""
+        positions = self._positions(questions_ids)
+
+        return self.current[positions].all(axis=0) | self.previous[positions].all(axis=0)
+
+    def add(self, questions_ids: np.ndarray) -> None:
+        if self.count >= self.capacity:
+            self.previous = self.current
+            self.current = np.zeros(self.bits, dtype=bool)
+            self.count = 0
+
+        self.current[self._positions(questions_ids).ravel()] = True
+        self.count += len(questions_ids)
+
+    def to_bytes(self) -> bytes:
+        return _HEADER.pack(self.count) + np.packbits(self.current).tobytes() + np.packbits(self.previous).tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes, **kwargs) -> "SeenFilter":
+        seen_filter = cls(**kwargs)
+        (count,) = _HEADER.unpack_from(data)
+
+        bits = np.unpackbits(np.frombuffer(data, dtype=np.uint8, offset=_HEADER.size)).astype(bool)
+
+        # Ignore stored filter if it was created with different size
+        if bits.size != seen_filter.bits * 2:
+            return seen_filter
+
+        seen_filter.current = bits[:seen_filter.bits].copy()
+        seen_filter.previous = bits[seen_filter.bits:].copy()
+        seen_filter.count = count
+
+        return seen_filter
+
+
+class SeenStore:
+    def __init__(self, ttl: int = 3600 * 24 * 7, **filter_kwargs):
+        """
+        Redis storage of users' seen filters. Every issued quiz saves the filter as new generation and removes the
+        previous one
+        :param ttl: how much time(seconds) user's filter is kept after the last quiz
+        :param filter_kwargs: size, hashes and window of seen filters
+        """
+        self.ttl = ttl
+        self.filter_kwargs = filter_kwargs
+
+    @staticmethod
+    def _pointer_key(user_id: int) -> str:
+        return f"quiz_seen:{user_id}"
+
+    @staticmethod
+    def _filter_key(user_id: int, generation: int) -> str:
+        return f"quiz_seen:{user_id}:{generation}"
+
+    async def load(self, user_id: int) -> tuple[int, SeenFilter | None]:
+        """
+        Get current generation and filter of the user, generation is 0 if user hasn't filter. Filter is None if redis
+        is unavailable, quizzes are chosen without it then
+        """
+        try:
+            generation = await redis_client.get(self._pointer_key(user_id))
+            generation = int(generation) if generation is not None else 0
+
+            seen_filter = await self.load_generation(user_id=user_id, generation=generation) if generation else None
+
+        except RedisError:
+            logger.warning("Redis is unavailable, quiz is chosen without seen filter")
+            return 0, None
+
+        if seen_filter is None:
+            return 0, SeenFilter(**self.filter_kwargs)
+
+        return generation, seen_filter
+
+    async def load_generation(self, user_id: int, generation: int) -> SeenFilter | None:
+        """Get filter of specific generation or None if it is expired"""
+        data = await redis_client.get(self._filter_key(user_id, generation))
+
+        if data is None:
+            return None
+
+        return SeenFilter.from_bytes(data, **self.filter_kwargs)
+
+    async def remember(self, user_id: int, generation: int, seen_filter: SeenFilter, questions_ids: list[int]) -> None:
+        """
+        Add questions of issued quiz to the filter and save it as next generation. Quiz is already chosen, so redis
+        failure isn't raised, the questions aren't remembered then
+        """
+        seen_filter.add(np.asarray(questions_ids, dtype=np.int64))
+
+        try:
+            async with redis_client.pipeline(transaction=True) as pipe:
+                pipe.set(self._filter_key(user_id, generation + 1), seen_filter.to_bytes(), ex=self.ttl)
+                pipe.set(self._pointer_key(user_id), generation + 1, ex=self.ttl)
+
+                if generation:
+                    pipe.delete(self._filter_key(user_id, generation))
+
+                await pipe.execute()
+
+        except RedisError:
+            logger.warning("Redis is unavailable, questions of quiz weren't added to seen filter")
+
+
+seen_store = SeenStore(ttl=QUIZ_SEEN_TTL, bits=QUIZ_SEEN_BITS, capacity=QUIZ_SEEN_WINDOW)
@@ -1,6 +1,6 @@
 import itertools
 
-from sqlalchemy import select, update, insert, desc, delete
+from sqlalchemy import select, update, insert, desc
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from api.rating.rating_models import rating
@@ -45,10 +45,3 @@ async def insert_rating_db(rating_create: RatingCreate, session: AsyncSession):
     stmt = insert(rating).values(**rating_create.model_dump())
     await session.execute(stmt)
     await session.commit()
-
-
-async def delete_rating_db(user_id: int, session: AsyncSession):
-    """Delete all rating records for user"""
-    stmt = delete(rating).where(rating.c.user_id == user_id)
-    await session.execute(stmt)
-    await session.commit()
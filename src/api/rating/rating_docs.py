@@ -32,49 +32,6 @@ GET_RATING_SUPERVISOR_RESPONSE: OpenAPIResponseType = {
         },
     },
 }
-POST_RATING_RESPONSES: OpenAPIResponseType = {
-    status.HTTP_400_BAD_REQUEST: {
-        "model": ErrorModel,
-        "content": {
-            "application/json": {
-                "examples": {
-                    ErrorCode.QUESTIONS_NUMBER_INVALID: {
-                        "summary": "Invalid number of questions",
-                        "value": {"detail": ErrorCode.QUESTIONS_NUMBER_INVALID},
-                    },
-                    ErrorCode.PERMANENTLY_BLOCKED: {
-                        "summary": "Permanently blocked",
-                        "value": {"detail": ErrorCode.PERMANENTLY_BLOCKED},
-                    },
-                    ErrorCode.UNBLOCKED_AFTER: {
-                        "summary": "Raise blocking level",
-                        "value": {"detail": "You are blocked now, please return after n days"},
-                    },
-                    ErrorCode.TEMPORARY_BLOCKED: {
-                        "summary": "Temporary blocked",
-                        "value": {"detail": ErrorCode.TEMPORARY_BLOCKED},
-                    },
-                    ErrorCode.WARNING_USER: {
-                        "summary": "Warning user",
-                        "value": {"detail": ErrorCode.WARNING_USER},
-                    },
-                }
-            },
-        },
-    },
-    status.HTTP_405_METHOD_NOT_ALLOWED: {
-        "model": ErrorModel,
-        "content": {
-            "application/json": {
-                "examples": {ErrorCode.ONLY_USER: {
-                    "summary": "Only user can have rating",
-                    "value": {"detail": ErrorCode.ONLY_USER},
-                }
-                }
-            },
-        },
-    },
-}
 SERVER_ERROR_UNAUTHORIZED_RESPONSE: OpenAPIResponseType = {
     status.HTTP_429_TOO_MANY_REQUESTS: {
         "model": ErrorModel,
@@ -137,5 +94,4 @@ SERVER_ERROR_AUTHORIZED_RESPONSE: OpenAPIResponseType = {
 }
 
 GET_RATING_SUPERVISOR_RESPONSE.update(SERVER_ERROR_AUTHORIZED_RESPONSE)
-POST_RATING_RESPONSES.update(SERVER_ERROR_AUTHORIZED_RESPONSE)
 GET_RATING_RESPONSE.update(SERVER_ERROR_AUTHORIZED_RESPONSE)
@@ -0,0 +1,63 @@
+from datetime import datetime
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.auth.auth_models import User
+from api.blacklist.blacklist_service import get_blocking_level, manage_blocking_level, get_blocking_time
+from api.rating.rating_db import get_last_rating_user, update_rating_db, insert_rating_db
+from api.rating.rating_schemas import RatingRead, RatingUpdate, RatingCreate
+from api.warning.warning_service import manage_warning_level
+from utilties.custom_exceptions import QuestionsInvalidNumber, NotUser, BlockedReturnAfter
+
+
+async def add_rating_service(
+        rating_read: RatingRead,
+        user: User,
+        session: AsyncSession
+) -> None:
+    """Add result of the quiz to student's rating or raise exception if student should be warned or blocked"""
+    unblocked_after = await get_blocking_time(user_id=user.id, session=session)
+
+    if unblocked_after is not None:
+        raise BlockedReturnAfter(unblocked_after)
+
+    if user.role_id != 1:
+        raise NotUser
+
+    if rating_read.solved > rating_read.questions_number:
+        raise QuestionsInvalidNumber
+
+    if rating_read.questions_number not in range(30, 51) or rating_read.solved not in range(51):
+        raise QuestionsInvalidNumber
+
+    solved = rating_read.solved
+    questions_number = rating_read.questions_number
+
+    if solved / questions_number < 0.11 or solved < 3:
+        # Get blocking level if exits and update it
+        blocking_level = await get_blocking_level(user_id=user.id, session=session)
+
+        if blocking_level is not None:
+            await manage_blocking_level(user_id=user.id, session=session)
+
+        else:
+            # Manage user's warnings
+            await manage_warning_level(user_id=user.id, session=session)
+
+    last_rating = await get_last_rating_user(user_id=user.id, session=session)
+
+    if last_rating and last_rating[0]["added_at"].date() == datetime.now().date():
+        total_questions = rating_read.questions_number + last_rating[0]["questions_number"]
+        total_solved = rating_read.solved + last_rating[0]["solved"]
+
+        rating_update = RatingUpdate(questions_number=total_questions,
+                                     solved=total_solved)
+        await update_rating_db(rating_id=last_rating[0]["id"], updated_rating=rating_update, session=session)
+
+    else:
+        rating_create = RatingCreate(user_id=user.id,
+                                     university_id=user.university_id,
+                                     questions_number=rating_read.questions_number,
+                                     solved=rating_read.solved)
+
+        await insert_rating_db(rating_create=rating_create, session=session)
@@ -0,0 +1,58 @@
+"""
+Quiz weights of sections existing before weights were kept in section table are filled by one-off job, run it from
+src directory after upgrading the database:
+    python -m api.section.section_backfill
+
+Quiz was composed of sections 1, 2 and 3 with 60/20/20 split before, new quiz_weight column gives every section weight
+1, so the old split is restored and other sections stay out of quiz as before. Weights are changed only if all sections
+still have the default weight, so running the job again doesn't overwrite weights set by admin
+"""
+import asyncio
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.section.section_models import Section
+from api.section.section_service import section_weights
+from db.database import async_session_maker
+
+# Split of quiz between sections before weights were kept in section table
+LEGACY_QUIZ_WEIGHTS = {1: 0.6, 2: 0.2, 3: 0.2}
+
+
+async def backfill_quiz_weights_db(session: AsyncSession) -> bool:
+    """
+    Give sections 1, 2 and 3 their old share of quiz and weight 0 to other sections if weights weren't changed
+    after upgrade
+    :returns: whether weights were changed
+    """
+    result_proxy = await session.execute(select(Section.id, Section.quiz_weight))
+    weights = dict(result_proxy.tuples().all())
+
+    if not weights or any(weight != 1 for weight in weights.values()):
+        return False
+
+    await session.execute(
+        update(Section),
+        [{"id": section_id, "quiz_weight": LEGACY_QUIZ_WEIGHTS.get(section_id, 0)} for section_id in weights]
+    )
+    await session.commit()
+
+    section_weights.clear()
+
+    return True
+
+
+async def backfill() -> None:
+    async with async_session_maker() as session:
+        changed = await backfill_quiz_weights_db(session=session)
+
+    print("Quiz weights are restored" if changed else "Quiz weights were already set, nothing is changed")
+
+
+def main() -> None:
+    asyncio.run(backfill())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
-from sqlalchemy import String
+from sqlalchemy import String, Float
 from sqlalchemy.orm import Mapped, mapped_column
 
 from api.section.section_schemas import SectionSchema
@@ -9,9 +9,13 @@ class Section(Base):
     __tablename__ = "section"
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[int] = mapped_column(String(length=25), nullable=False, unique=True)
+    # Share of section questions in quiz relatively to other sections, section isn't used in quiz if it is 0
+    # Existing databases get the old 60/20/20 split from section_backfill job
+    quiz_weight: Mapped[float] = mapped_column(Float, nullable=False, default=1.0, server_default="1")
 
     def to_read_model(self) -> SectionSchema:
         return SectionSchema(
             id=self.id,
-            name=self.name
+            name=self.name,
+            quiz_weight=self.quiz_weight
         )
@@ -4,5 +4,6 @@ from pydantic import BaseModel
 class SectionSchema(BaseModel):
     id: int
     name: str
+    quiz_weight: float = 1.0
 
 
@@ -1,3 +1,5 @@
+import time
+
 from api.section.section_schemas import SectionSchema
 from core.unit_of_work import IUnitOfWork
 from utilties.custom_exceptions import OutOfSectionIdException
@@ -40,3 +42,30 @@ class SectionService:
                 raise OutOfSectionIdException
 
             return section
+
+
+class SectionWeightsCache:
+    def __init__(self, expire: int = 300):
+        """
+        In-memory cache of sections weights used to compose quizzes
+        :param expire: how much time(seconds) weights are cached
+        """
+        self.expire = expire
+        self._weights: dict[int, float] = {}
+        self._loaded_at: float | None = None
+
+    async def get(self, uow: IUnitOfWork) -> dict[int, float]:
+        """Get weights of sections that are used in quiz"""
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > self.expire:
+            sections = await SectionService.get_sections(uow=uow)
+
+            self._weights = {section.id: section.quiz_weight for section in sections if section.quiz_weight > 0}
+            self._loaded_at = time.monotonic()
+
+        return self._weights
+
+    def clear(self) -> None:
+        self._loaded_at = None
+
+
+section_weights = SectionWeightsCache()
@@ -6,7 +6,9 @@ from sqladmin import Admin
 
 from all_routers_and_views import all_routers, all_admin_views
 from api.admin_panel.admin_auth import AdminAuth
-from config import SECRET_KEY
+from api.question.question_similarity import similarity_index
+from api.quiz.quiz_pool import quiz_pool
+from config import SECRET_KEY, REDIS_URL
 from db.database import engine
 
 app: FastAPI = FastAPI(
@@ -38,12 +40,19 @@ admin = Admin(app=app, engine=engine, authentication_backend=authentication_back
 
 @app.on_event("startup")
 async def startup_event():
-    redis = await aioredis.from_url("redis://localhost:6379", max_connections=100)
+    redis = await aioredis.from_url(REDIS_URL, max_connections=100)
     FastAPICache.init(RedisBackend(redis), prefix="fastapi-cache")
 
+    # Keep ready-made quizzes for spikes of quiz requests
+    quiz_pool.start()
+
+    # Near-duplicates check of new questions works when the index is loaded
+    similarity_index.start_loading()
+
 
 @app.on_event("shutdown")
 async def startup_event():
+    await quiz_pool.stop()
     await FastAPICache.clear()
 
 
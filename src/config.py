@@ -12,6 +12,19 @@ DB_NAME = os.environ.get("DB_NAME")
 
 SECRET_KEY = os.environ.get("SECRET_KEY")
 
+REDIS_URL = os.environ.get("REDIS_URL", "redis://localhost:6379")
+
+# Strategy of live quiz generation, index or window
+QUIZ_STRATEGY = os.environ.get("QUIZ_STRATEGY", "index")
+
+# Recently seen questions: how long(seconds) user's filter is kept, bits of filter(power of two) and how many
+# questions fill one window, filter remembers between one and two windows
+QUIZ_SEEN_TTL = int(os.environ.get("QUIZ_SEEN_TTL", 3600 * 24 * 7))
+QUIZ_SEEN_BITS = int(os.environ.get("QUIZ_SEEN_BITS", 8192))
+QUIZ_SEEN_WINDOW = int(os.environ.get("QUIZ_SEEN_WINDOW", 400))
+# The biggest share of seen questions that ready-made quiz can have to be given to user
+QUIZ_POOL_MAX_SEEN_SHARE = float(os.environ.get("QUIZ_POOL_MAX_SEEN_SHARE", 0.1))
+
 SMTP_USER = os.environ.get("SMTP_USER")
 SMTP_PASSWORD = os.environ.get("SMTP_PASSWORD")
 
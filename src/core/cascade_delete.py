@@ -0,0 +1,115 @@
+from fastapi_users.manager import BaseUserManager
+from sqlalchemy import Table, Column, select, delete, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.auth.auth_models import User
+from api.blacklist.blacklist_models import Blacklist
+from api.feedback.feedback_models import feedback, author_feedback_stats, question_feedback_stats
+from api.feedback.feedback_stats import add_feedbacks_stats_db
+from api.question.question_db import discard_questions
+from api.question.question_models import question
+from api.rating.rating_models import rating
+from api.warning.warning_models import warning
+from utilties.custom_exceptions import QuestionNotFound
+
+# The most rows deleted by one statement, so every statement locks and logs bounded number of rows
+DELETE_CHUNK_SIZE = 1000
+
+
+async def _delete_chunked(table: Table, condition, session: AsyncSession, key: Column = None) -> list[int]:
+    """
+    Delete rows matching condition chunk by chunk without committing
+    :param key: primary key column of the table, id by default
+    :returns: keys of deleted rows
+    """
+    key = table.c.id if key is None else key
+    deleted_ids = []
+
+    while True:
+        query = select(key).where(condition).order_by(key).limit(DELETE_CHUNK_SIZE)
+        result_proxy = await session.execute(query)
+        ids = result_proxy.scalars().all()
+
+        if ids:
+            await session.execute(delete(table).where(key.in_(ids)))
+            deleted_ids.extend(ids)
+
+        if len(ids) < DELETE_CHUNK_SIZE:
+            return deleted_ids
+
+
+async def _delete_feedbacks_chunked(condition, session: AsyncSession) -> None:
+    """Delete feedbacks chunk by chunk without committing and remove their ratings from aggregates"""
+    while True:
+        query = select(feedback.c.id, feedback.c.rating, feedback.c.question_id, feedback.c.question_author_id). \
+            where(condition).order_by(feedback.c.id).limit(DELETE_CHUNK_SIZE)
+        result_proxy = await session.execute(query)
+        rows = result_proxy.all()
+
+        if rows:
+            await session.execute(delete(feedback).where(feedback.c.id.in_([row.id for row in rows])))
+
+            await add_feedbacks_stats_db(feedbacks=rows, removed=True, session=session)
+
+        if len(rows) < DELETE_CHUNK_SIZE:
+            return None
+
+
+async def delete_question_cascade(question_id: int, session: AsyncSession) -> None:
+    """
+    Delete question with its feedbacks in one transaction
+    :raises QuestionNotFound: if question doesn't exist, nothing is deleted then
+    """
+    try:
+        await _delete_feedbacks_chunked(condition=feedback.c.question_id == question_id, session=session)
+        await session.execute(
+            delete(question_feedback_stats).where(question_feedback_stats.c.question_id == question_id)
+        )
+
+        result_proxy = await session.execute(delete(question).where(question.c.id == question_id))
+
+        if not result_proxy.rowcount:
+            raise QuestionNotFound
+
+        await session.commit()
+
+    except Exception:
+        await session.rollback()
+        raise
+
+    discard_questions(questions_ids=[question_id])
+
+
+async def delete_user_cascade(user: User, user_manager: BaseUserManager, session: AsyncSession) -> None:
+    """
+    Delete user with everything that references it in one transaction: feedbacks sent or received by the user,
+    ratings, warnings, blacklist records and questions added by the user. The user itself is deleted by user manager,
+    so its delete hooks run, it commits the transaction
+    :param user_manager: user manager working on the same session
+    """
+    user_id = user.id
+
+    try:
+        await _delete_feedbacks_chunked(
+            condition=or_(feedback.c.user_id == user_id, feedback.c.question_author_id == user_id),
+            session=session
+        )
+        await session.execute(delete(author_feedback_stats).where(author_feedback_stats.c.author_id == user_id))
+        await _delete_chunked(table=question_feedback_stats, key=question_feedback_stats.c.question_id,
+                              condition=question_feedback_stats.c.question_id.in_(
+                                  select(question.c.id).where(question.c.added_by == user_id)
+                              ),
+                              session=session)
+        await _delete_chunked(table=rating, condition=rating.c.user_id == user_id, session=session)
+        await _delete_chunked(table=warning, condition=warning.c.user_id == user_id, session=session)
+        await _delete_chunked(table=Blacklist.__table__, condition=Blacklist.user_id == user_id, session=session)
+        questions_ids = await _delete_chunked(table=question, condition=question.c.added_by == user_id,
+                                              session=session)
+
+        await user_manager.delete(user)
+
+    except Exception:
+        await session.rollback()
+        raise
+
+    discard_questions(questions_ids=questions_ids)
@@ -4,6 +4,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from api.auth.auth_models import User
 from api.auth.base_config import current_user, current_superuser, unverified_user
+from api.quiz.quiz_db import QuizStrategy, get_quiz_strategy
 from core.unit_of_work import UnitOfWork, IUnitOfWork
 from db.database import get_async_session
 
@@ -11,4 +12,5 @@ UOWDep = Annotated[IUnitOfWork, Depends(UnitOfWork)]
 CurrentUser = Annotated[User, Depends(current_user)]
 CurrentSuperUser = Annotated[User, Depends(current_superuser)]
 CurrentUnverifiedUser = Annotated[User, Depends(unverified_user)]
-Session = Annotated[AsyncSession, Depends(get_async_session)]
\ No newline at end of file
+Session = Annotated[AsyncSession, Depends(get_async_session)]
+QuizStrategyDep = Annotated[QuizStrategy, Depends(get_quiz_strategy)]
@@ -0,0 +1,5 @@
+from redis import asyncio as aioredis
+
+from config import REDIS_URL
+
+redis_client = aioredis.from_url(REDIS_URL, max_connections=100)
@@ -0,0 +1,50 @@
+import base64
+from datetime import datetime, timedelta
+
+import orjson
+
+from utilties.custom_exceptions import InvalidCursor
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def encode_cursor(*values: int | float) -> str:
+    """Pack keyset values of the last returned row into opaque url-safe token"""
+    return base64.urlsafe_b64encode(orjson.dumps(values)).rstrip(b"=").decode()
+
+
+def decode_cursor(token: str, size: int = 1) -> tuple:
+    """
+    Unpack keyset values from token
+    :param token: token returned by encode_cursor
+    :param size: how many values token should have
+    :raises InvalidCursor: if token is damaged or made for another listing
+    """
+    try:
+        values = orjson.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+
+    except (ValueError, orjson.JSONDecodeError):
+        raise InvalidCursor
+
+    if (not isinstance(values, list) or len(values) != size or
+            not all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in values)):
+        raise InvalidCursor
+
+    return tuple(values)
+
+
+def timestamp_to_cursor(value: datetime) -> int:
+    """Microseconds since epoch of naive utc datetime, so it can be packed into cursor"""
+    return (value - _EPOCH) // timedelta(microseconds=1)
+
+
+def cursor_to_timestamp(value: int) -> datetime:
+    """
+    Naive utc datetime back from cursor value
+    :raises InvalidCursor: if value is out of datetime range
+    """
+    try:
+        return _EPOCH + timedelta(microseconds=value)
+
+    except OverflowError:
+        raise InvalidCursor
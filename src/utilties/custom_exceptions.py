@@ -121,3 +121,23 @@ class BlockedReturnAfter(Exception):
 class EmptyList(Exception):
     """EMPTY_LIST"""
     pass
+
+
+class QuizAttemptNotFound(Exception):
+    """QUIZ_ATTEMPT_NOT_FOUND"""
+    pass
+
+
+class InvalidCursor(Exception):
+    """INVALID_CURSOR"""
+    pass
+
+
+class InvalidFileFormat(Exception):
+    """INVALID_FILE_FORMAT"""
+    pass
+
+
+class EmptyQuestionsFilter(Exception):
+    """EMPTY_QUESTIONS_FILTER"""
+    pass
@@ -47,3 +47,10 @@ class ErrorCode(str, Enum):
     WARNING_USER = "WARNING_USER"
     UNBLOCKED_AFTER = "UNBLOCKED_AFTER"
     EMPTY_LIST = "EMPTY_LIST"
+    QUIZ_ATTEMPT_NOT_FOUND = "QUIZ_ATTEMPT_NOT_FOUND"
+    INVALID_CURSOR = "INVALID_CURSOR"
+    INVALID_FILE_FORMAT = "INVALID_FILE_FORMAT"
+    INVALID_IMPORT_ROW = "INVALID_IMPORT_ROW"
+    EMPTY_QUESTIONS_FILTER = "EMPTY_QUESTIONS_FILTER"
+    IMPORT_VALUE_TOO_LONG = "IMPORT_VALUE_TOO_LONG"
+    IMPORT_ROW_NOT_INSERTED = "IMPORT_ROW_NOT_INSERTED"
@@ -0,0 +1,66 @@
+import gzip
+from typing import Any
+
+import orjson
+from starlette.requests import Request
+from starlette.responses import Response
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is used without it
+    brotli = None
+
+# Smaller bodies don't win enough bytes to pay for compression
+MINIMUM_COMPRESSION_SIZE = 1024
+
+
+def _accepted_encodings(request: Request) -> set[str]:
+    """Encodings that client accepts, encodings with q=0 are refused"""
+    encodings = set()
+
+    for item in request.headers.get("accept-encoding", "").split(","):
+        encoding, _, quality = item.strip().lower().partition(";q=")
+
+        try:
+            if quality and float(quality) == 0:
+                continue
+        except ValueError:
+            continue
+
+        encodings.add(encoding.strip())
+
+    return encodings
+
+
+def _compress(request: Request, body: bytes) -> tuple[bytes, str | None]:
+    """Compress body with the best encoding that client accepts"""
+    if len(body) < MINIMUM_COMPRESSION_SIZE:
+        return body, None
+
+    encodings = _accepted_encodings(request)
+
+    if brotli is not None and "br" in encodings:
+        return brotli.compress(body, quality=4), "br"
+
+    if "gzip" in encodings:
+        return gzip.compress(body, compresslevel=5), "gzip"
+
+    return body, None
+
+
+def success_response(request: Request, data: bytes, details: Any = None, details_key: str = "details") -> Response:
+    """
+    Build success envelope around already serialized data without validating or encoding it again
+    :param data: json of response data
+    :param details: details of response, it is serialized with orjson
+    :param details_key: name of details field, some endpoints name it detail
+    """
+    body = b'{"status":"success","data":' + data + b',"' + details_key.encode() + b'":' + orjson.dumps(details) + b"}"
+    body, encoding = _compress(request=request, body=body)
+
+    headers = {"vary": "Accept-Encoding"}
+
+    if encoding is not None:
+        headers["content-encoding"] = encoding
+
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,9 @@
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+# Modules create database engine on import, tests don't connect to it
+for name, value in (("DB_HOST", "localhost"), ("DB_PORT", "3306"), ("DB_NAME", "test"), ("DB_USER", "test"),
+                    ("DB_PASSWORD", "test")):
+    os.environ.setdefault(name, value)
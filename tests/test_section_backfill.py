@@ -0,0 +1,49 @@
+import pytest
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+pytest.importorskip("aiosqlite")
+
+from api.quiz.quiz_db import get_sections_counts  # noqa: E402
+from api.section.section_backfill import backfill_quiz_weights_db  # noqa: E402
+from api.section.section_models import Section  # noqa: E402
+
+
+async def _upgraded_session(sections_ids: list[int]) -> AsyncSession:
+    """Section table after quiz_weight column was added, rows get default weight of the column"""
+    engine = create_async_engine("sqlite+aiosqlite://")
+
+    async with engine.begin() as connection:
+        await connection.run_sync(Section.__table__.create)
+        await connection.execute(insert(Section.__table__),
+                                 [{"id": section_id, "name": f"section {section_id}"} for section_id in sections_ids])
+
+    return AsyncSession(engine)
+
+
+async def _get_weights(session: AsyncSession) -> dict[int, float]:
+    result_proxy = await session.execute(select(Section.id, Section.quiz_weight))
+
+    return dict(result_proxy.tuples().all())
+
+
+@pytest.mark.asyncio
+async def test_backfill_restores_old_split():
+    async with await _upgraded_session(sections_ids=[1, 2, 3, 4]) as session:
+        assert await backfill_quiz_weights_db(session=session)
+
+        weights = await _get_weights(session=session)
+
+    assert weights == {1: 0.6, 2: 0.2, 3: 0.2, 4: 0}
+    assert get_sections_counts(number_questions=50, weights={k: v for k, v in weights.items() if v > 0}) == \
+        {1: 30, 2: 10, 3: 10}
+
+
+@pytest.mark.asyncio
+async def test_backfill_keeps_weights_set_by_admin():
+    async with await _upgraded_session(sections_ids=[1, 2, 3]) as session:
+        await session.execute(Section.__table__.update().where(Section.id == 2).values(quiz_weight=3))
+        await session.commit()
+
+        assert not await backfill_quiz_weights_db(session=session)
+        assert await _get_weights(session=session) == {1: 1, 2: 3, 3: 1}